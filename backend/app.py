@@ -1,53 +1,146 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context, g
 from flask_cors import CORS
-import cv2
 import numpy as np
 import base64
-from deepface import DeepFace
+import auth
+import metrics
+from gallery import Gallery, normalize
+from gallery_index import create_index
+from embedding_cache import EmbeddingCache
+from database import db_pool, export_pool, get_db_connection, get_export_connection
+from db_pool import PoolTimeout
+from local_store import LocalStore, OFFLINE_MODE
+from pymysql.cursors import SSDictCursor
+from attendance_queue import AttendanceQueue, QueueFull
+import attendance_summary
+import embedding_codec
+import face_templates
 import os
 import json
+import math
+import threading
+import logging
+import time
 from datetime import datetime
 import uuid
 from werkzeug.utils import secure_filename
-import pymysql
-import requests
 import jwt
 from functools import wraps
+from concurrent.futures import ThreadPoolExecutor
+
+logging.basicConfig(
+    level=os.environ.get('LOG_LEVEL', 'INFO').upper(),
+    format='%(asctime)s %(levelname)s %(name)s: %(message)s'
+)
+logger = logging.getLogger('face_verification')
+
 app = Flask(__name__)
 CORS(app, supports_credentials=True,
      origins=["http://localhost:5173"])
 
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_latency(response):
+    """Per-endpoint latency histogram (scrapes of /api/metrics itself are skipped)"""
+    started = g.get('request_started')
+    if started is not None and request.endpoint != 'prometheus_metrics':
+        metrics.request_seconds.observe(time.perf_counter() - started,
+                                        request.endpoint or 'unmatched', request.method, str(response.status_code))
+    return response
+
 # Create directories for storing employee images and data
 os.makedirs('backend/employee_images', exist_ok=True)
 os.makedirs('backend/data', exist_ok=True)
 
 # Employee database file
-EMPLOYEES_DB = 'backend/data/employees.json'
-ATTENDANCE_DB = 'backend/data/attendance.json'
+# Local employee/attendance store (SQLite); also the only store in OFFLINE_MODE
+# Legacy employees.json/attendance.json are imported once, explicitly, with
+# `python local_store.py --import-json` (not here: every worker would race to
+# import and rename the same files)
+local_store = LocalStore()
+
+# Process role: 'all' serves every route; 'api' serves everything except the
+# face inference routes and never loads deepface/TensorFlow, so attendance,
+# employee, login and health workers start fast and small
+APP_ROLE = os.environ.get('APP_ROLE', 'all')
+INFERENCE_ENABLED = APP_ROLE != 'api'
+
+# Face embedding backend: in-process micro-batching scheduler, or a pool of
+# forked worker processes sharing one model copy (INFERENCE_WORKERS > 0).
+# Started before any other background thread so forking is safe. The
+# inference and image modules import OpenCV, so an api-role process skips
+# them (add_employee imports what it needs on first use)
+inference = None
+if INFERENCE_ENABLED:
+    import cv2
+    import image_payload
+    import inference_pool
+    import inference_scheduler
+    import model_manager
+    import quality_gate
+    inference = inference_pool.InferencePool() if inference_pool.INFERENCE_WORKERS > 0 else inference_scheduler
+    inference.start()
 
 SECRET_KEY = "your-secret-key-here"
 
+# Storage format for new face_embedding values: json, float32, float16 or int8.
+# The binary formats need the MEDIUMBLOB column created by migrate_embeddings.py
+# (a text column rejects them), so json stays the default until it has run
+EMBEDDING_STORAGE_FORMAT = os.environ.get('EMBEDDING_STORAGE_FORMAT', 'json')
+# Store json rows as template sets (a list of lists). Workers from before
+# template sets can only parse a flat list, so this stays off (each set is
+# stored as its mean) until every worker runs this version
+EMBEDDING_JSON_TEMPLATES = os.environ.get('EMBEDDING_JSON_TEMPLATES', '0') == '1'
+# Whether face_embedding keeps every template or only a collapsed mean
+STORES_TEMPLATE_SETS = EMBEDDING_STORAGE_FORMAT != 'json' or EMBEDDING_JSON_TEMPLATES
+
+# Minimum cosine similarity for a face match
+MATCH_THRESHOLD = 0.6
+
+# Seconds before the 1:N gallery is reloaded to pick up other workers' registrations
+GALLERY_TTL = int(os.environ.get('GALLERY_TTL', '300'))
+
+# Gallery index: 'exact' brute force or 'ivf' approximate search for large galleries
+GALLERY_INDEX = os.environ.get('GALLERY_INDEX', 'exact')
+GALLERY_INDEX_PATH = os.environ.get('GALLERY_INDEX_PATH', 'backend/data/gallery_index.npz')
+IVF_NPROBE = int(os.environ.get('IVF_NPROBE', '48'))
+
+# face_stage_seconds route label for each token_required endpoint, so the auth
+# and profile stages line up with the stages the handlers record themselves
+STAGE_ROUTES = {
+    'recognize_face': 'recognize',
+    'recognize_face_batch': 'recognize_batch',
+    'mark_attendance': 'attendance'
+}
+
 
 
 def token_required(f):
+    """Verify the auth_token cookie and resolve the caller's profile into g.employee.
+
+    Verified tokens are cached until their exp, and the profile comes from
+    the embedding cache, so a repeat check-in costs no signature check and no
+    profile query. g.employee is None if the employee no longer exists.
+    """
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = None
-        print(request.cookies)
         # Get token from cookies
         token = request.cookies.get('auth_token')
-        print(f"Token received: {token}")
-        
         
         if not token:
+            logger.debug("Missing auth token for %s", request.path)
             return jsonify({
                 'success': False,
                 'message': 'Authentication token is missing'
             }), 401
             
+        route = STAGE_ROUTES.get(request.endpoint, request.endpoint)
         try:
-            # Decode the token
-            data = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+            with metrics.timed(route, 'auth'):
+                data = auth.verify_token(token, SECRET_KEY)
             current_user_id = data['user_id']
             
         except jwt.ExpiredSignatureError:
@@ -65,59 +158,211 @@ def token_required(f):
                 'success': False,
                 'message': str(e)
             }), 401
-            
+
+        try:
+            with metrics.timed(route, 'profile'):
+                g.employee = get_employee_embedding(current_user_id)
+        except Exception as e:
+            logger.exception("Could not load profile for user %s", current_user_id)
+            return jsonify({'error': str(e)}), 500
         return f(current_user_id, *args, **kwargs)
         
     return decorated
 
-def get_db_connection():
-    return pymysql.connect(
-    host='mt-uat-lighthouse.cal82oikkybf.ap-south-1.rds.amazonaws.com',
-    user='FaceRecongition',
-    password='password@123',
-    db='FaceRecognition',
-    cursorclass=pymysql.cursors.DictCursor
-)
+def inference_required(f):
+    """503 for face inference routes on an APP_ROLE=api process"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if not INFERENCE_ENABLED:
+            return jsonify({
+                'success': False,
+                'error': 'Face inference is not served by this process (APP_ROLE=api)'
+            }), 503
+        return f(*args, **kwargs)
+
+    return decorated
+
+gallery = Gallery(create_index(GALLERY_INDEX, nprobe=IVF_NPROBE))
+# Held by whoever is restoring or rebuilding the gallery, so only one does
+gallery_lock = threading.Lock()
+
+def load_gallery():
+    """Rebuild the gallery from the database (or local store) and persist it; caller holds gallery_lock"""
+    if OFFLINE_MODE:
+        rows = local_store.embedding_rows()
+    else:
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT id, name, department, email, face_embedding
+                    FROM Employee
+                    WHERE face_embedding IS NOT NULL
+                """)
+                rows = cursor.fetchall()
+        finally:
+            conn.close()
+    gallery.load(rows)
+    logger.info("Loaded %d embeddings into the gallery", len(gallery))
+    try:
+        gallery.save(GALLERY_INDEX_PATH)
+    except Exception as e:
+        logger.warning("Could not persist gallery index: %s", e)
+
+def refresh_gallery():
+    """Background TTL refresh; the stale gallery keeps serving until it is done"""
+    try:
+        load_gallery()
+    except Exception:
+        logger.exception("Gallery refresh failed")
+    finally:
+        gallery_lock.release()
+
+def get_gallery():
+    """Return the 1:N gallery.
+
+    The first call restores it from disk or loads it from the database;
+    concurrent callers wait for that one load. Once it is older than
+    GALLERY_TTL, a single background thread reloads it while requests keep
+    searching the current one.
+    """
+    if gallery.loaded_at is None:
+        with gallery_lock:
+            if gallery.loaded_at is None:
+                try:
+                    if gallery.restore(GALLERY_INDEX_PATH, kind=GALLERY_INDEX):
+                        if GALLERY_INDEX == 'ivf':
+                            gallery.index.nprobe = IVF_NPROBE
+                        logger.info("Restored %d embeddings from %s", len(gallery), GALLERY_INDEX_PATH)
+                except Exception as e:
+                    logger.warning("Could not restore gallery index: %s", e)
+            if gallery.loaded_at is None:
+                load_gallery()
+    elif time.time() - gallery.loaded_at > GALLERY_TTL and gallery_lock.acquire(blocking=False):
+        threading.Thread(target=refresh_gallery, name='gallery-refresh', daemon=True).start()
+    return gallery
+
+embedding_cache = EmbeddingCache()
+
+def get_employee_embedding(employee_id):
+    """Return {'profile', 'templates'} for an employee from the cache, falling back to the database"""
+    entry = embedding_cache.get(employee_id)
+    if entry is not None:
+        return entry
+
+    if OFFLINE_MODE:
+        employee = local_store.get_employee_row(employee_id)
+    else:
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT id, name, department, email, face_embedding 
+                    FROM Employee 
+                    WHERE id = %s
+                """, (employee_id,))
+                employee = cursor.fetchone()
+        finally:
+            conn.close()
+
+    if not employee:
+        return None
+
+    entry = {
+        'profile': {
+            'id': employee['id'],
+            'name': employee['name'],
+            'department': employee['department'],
+            'email': employee['email']
+        },
+        'templates': face_templates.from_blob(employee['face_embedding']) if employee['face_embedding'] else None
+    }
+    embedding_cache.put(employee_id, entry)
+    return entry
+
+attendance_queue = AttendanceQueue(get_db_connection, on_flush=attendance_summary.update_rollups)
+if not OFFLINE_MODE:
+    attendance_queue.start()
+
+def encode_embedding(embedding):
+    """Serialize an embedding or a template matrix for the face_embedding column"""
+    return embedding_codec.to_column(embedding, EMBEDDING_STORAGE_FORMAT, json_templates=EMBEDDING_JSON_TEMPLATES)
+
+template_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='template-writer')
+template_lock = threading.Lock()
+template_updates = metrics.registry.counter('face_template_updates_total', 'Check-in captures added as templates')
+
+def add_employee_template(employee_id, probe, confidence):
+    """Add a confident, novel check-in capture to an employee's template set (runs on template_writer)"""
+    try:
+        with template_lock:
+            entry = get_employee_embedding(employee_id)
+            if not entry or entry['templates'] is None:
+                return
+            if not face_templates.should_add(entry['templates'], probe, confidence):
+                return
+            templates, kept = face_templates.add(entry['templates'], probe)
+            if not kept:
+                # The capture was the most redundant template; nothing changed
+                return
+            stored = encode_embedding(templates)
+
+            if OFFLINE_MODE:
+                local_store.set_face_embedding(employee_id, stored)
+            else:
+                conn = get_db_connection()
+                try:
+                    with conn.cursor() as cursor:
+                        cursor.execute("UPDATE Employee SET face_embedding = %s WHERE id = %s", (stored, employee_id))
+                    conn.commit()
+                finally:
+                    conn.close()
+
+            embedding_cache.put(employee_id, dict(entry, templates=templates))
+            if gallery.loaded_at is not None:
+                gallery.add(entry['profile'], face_templates.centroid(templates))
+        template_updates.inc()
+        logger.info("Added a check-in template for %s (%d templates)", employee_id, len(templates))
+    except Exception:
+        logger.exception("Could not add a template for %s", employee_id)
+
+image_writer = ThreadPoolExecutor(max_workers=2, thread_name_prefix='image-writer')
+
+def save_employee_images(employee_dir, image_paths, uploads):
+    """Write enrollment images to disk (runs on the image_writer pool)"""
+    try:
+        os.makedirs(employee_dir, exist_ok=True)
+        for filepath, data in zip(image_paths, uploads):
+            with open(filepath, 'wb') as f:
+                f.write(data)
+    except Exception as e:
+        logger.error("Failed to save employee images in %s: %s", employee_dir, e)
 
 def load_employees():
-    """Load employees from JSON file"""
-    if os.path.exists(EMPLOYEES_DB):
-        with open(EMPLOYEES_DB, 'r') as f:
-            return json.load(f)
-    return []
+    """Load employees from the local store"""
+    return local_store.load_employees()
 
 def save_employees(employees):
-    """Save employees to JSON file"""
-    with open(EMPLOYEES_DB, 'w') as f:
-        json.dump(employees, f, indent=2)
+    """Upsert one employee (dict) or atomically replace all of them (list)"""
+    if isinstance(employees, dict):
+        local_store.save_employee(employees)
+    else:
+        local_store.replace_employees(employees)
 
 def load_attendance():
-    """Load attendance records from JSON file"""
-    if os.path.exists(ATTENDANCE_DB):
-        with open(ATTENDANCE_DB, 'r') as f:
-            return json.load(f)
-    return []
+    """Load attendance records from the local store"""
+    return local_store.load_attendance()
 
 def save_attendance(attendance):
-    """Save attendance records to JSON file"""
-    with open(ATTENDANCE_DB, 'w') as f:
-        json.dump(attendance, f, indent=2, default=str)
+    """Append one attendance record (dict) or atomically replace all of them (list)"""
+    if isinstance(attendance, dict):
+        local_store.append_attendance(attendance)
+    else:
+        local_store.replace_attendance(attendance)
 
 def base64_to_image(base64_string):
     """Convert base64 string to OpenCV image"""
-    # Remove data URL prefix if present
-    if ',' in base64_string:
-        base64_string = base64_string.split(',')[1]
-    
-    # Decode base64 to bytes
-    img_bytes = base64.b64decode(base64_string)
-    
-    # Convert bytes to numpy array
-    nparr = np.frombuffer(img_bytes, np.uint8)
-    
-    # Decode image
-    img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-    return img
+    return image_payload.decode_base64(base64_string)
 
 # Add this to your Flask app
 from flask import request, jsonify
@@ -129,17 +374,92 @@ from datetime import datetime, timedelta
 
 
 
+# Columns returned by GET /api/employees (never the face_embedding blob)
+EMPLOYEE_LIST_COLUMNS = "id, name, department, email, image_path, registration_date"
+
+def decode_employee_cursor(cursor):
+    last_name, last_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    return last_name, last_id
+
+def build_employees_query(args, limit=None):
+    """SELECT for the employee listing ordered by (name, id), with search and keyset cursor"""
+    conditions = []
+    params = []
+
+    if args.get('q'):
+        pattern = f"%{args['q']}%"
+        conditions.append("(name LIKE %s OR department LIKE %s OR email LIKE %s)")
+        params.extend([pattern, pattern, pattern])
+    if args.get('department'):
+        conditions.append("department = %s")
+        params.append(args['department'])
+    if args.get('cursor'):
+        last_name, last_id = decode_employee_cursor(args['cursor'])
+        conditions.append("(name > %s OR (name = %s AND id > %s))")
+        params.extend([last_name, last_name, last_id])
+
+    query = f"SELECT {EMPLOYEE_LIST_COLUMNS} FROM Employee"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY name, id"
+    if limit is not None:
+        query += " LIMIT %s"
+        params.append(limit)
+    return query, params
+
 @app.route('/api/employees', methods=['GET'])
 def get_employees():
-    """Get all employees from the MySQL database"""
+    """List employees without their face embeddings.
+
+    Query parameters: q (search name/department/email), department, and
+    limit/cursor for keyset pages ({'employees', 'next_cursor'}). Without
+    limit/cursor the full list is returned as an array. Responses carry an
+    ETag so unchanged listings come back as 304 Not Modified.
+    """
     try:
-        conn = get_db_connection()
-        with conn.cursor() as cursor:
-            cursor.execute("SELECT * FROM Employee")
-            employees = cursor.fetchall()
-        conn.close()
-        print(employees)
-        return jsonify(employees), 200
+        args = request.args
+        try:
+            paginated = 'limit' in args or 'cursor' in args
+            limit = None
+            if paginated:
+                limit = max(1, min(int(args.get('limit', 100)), 1000))
+            query, params = build_employees_query(args, limit=limit + 1 if paginated else None)
+        except (ValueError, TypeError) as e:
+            return jsonify({'success': False, 'error': f'Invalid query parameter: {str(e)}'}), 400
+
+        if OFFLINE_MODE:
+            employees = local_store.list_employees(
+                q=args.get('q'),
+                department=args.get('department'),
+                after=decode_employee_cursor(args['cursor']) if args.get('cursor') else None,
+                limit=limit + 1 if paginated else None
+            )
+            columns = [column.strip() for column in EMPLOYEE_LIST_COLUMNS.split(',')]
+            employees = [{column: employee.get(column) for column in columns} for employee in employees]
+        else:
+            conn = get_db_connection()
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(query, params)
+                    employees = cursor.fetchall()
+            finally:
+                conn.close()
+
+        if paginated:
+            has_more = len(employees) > limit
+            employees = employees[:limit]
+            next_cursor = None
+            if has_more:
+                last = employees[-1]
+                next_cursor = base64.urlsafe_b64encode(json.dumps([last['name'], last['id']]).encode('utf-8')).decode('ascii')
+            response = jsonify({'employees': employees, 'next_cursor': next_cursor})
+        else:
+            response = jsonify(employees)
+
+        # Let the dashboard revalidate cheaply with If-None-Match
+        response.cache_control.no_cache = True
+        response.add_etag()
+        return response.make_conditional(request)
 
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -147,22 +467,25 @@ def get_employees():
 @app.route('/api/employees', methods=['POST'])
 def add_employee():
     """Add a new employee with face image"""
+    # Served by api-role processes too, which don't load OpenCV at startup
+    import cv2
+    import image_payload
     try:
-        data = request.json
+        # Image as raw bytes, a multipart file or a base64 JSON field
+        try:
+            img, data = image_payload.from_request(request)
+        except ValueError as e:
+            return jsonify({'error': f'Image processing failed: {str(e)}'}), 400
         name = data.get('name')
         department = data.get('department')
         email = data.get('email')
-        image_base64 = data.get('image')
         
-        if not all([name, department, email, image_base64]):
+        if not all([name, department, email]) or img is None:
             return jsonify({'error': 'Missing required fields'}), 400
         
         # Generate unique ID
         employee_id = str(uuid.uuid4())
         
-        # Convert base64 image to OpenCV format
-        img = base64_to_image(image_base64)
-        
         # Save employee image
         image_path = f'backend/employee_images/{employee_id}.jpg'
         cv2.imwrite(image_path, img)
@@ -178,10 +501,8 @@ def add_employee():
             'created_at': datetime.now().isoformat()
         }
         
-        # Load existing employees and add new one
-        employees = load_employees()
-        employees.append(employee)
-        save_employees(employees)
+        # Single indexed upsert, no full rewrite
+        save_employees(employee)
         
         return jsonify({'message': 'Employee added successfully', 'employee': employee})
         
@@ -200,11 +521,16 @@ def login():
     email = data.get('email')
     
     try:
-        conn = get_db_connection()
-        with conn.cursor() as cursor:
-            cursor.execute("SELECT * FROM Employee WHERE email = %s", (email,))
-            user = cursor.fetchone()
-        conn.close()
+        if OFFLINE_MODE:
+            user = local_store.find_employee_by_email(email)
+        else:
+            conn = get_db_connection()
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT * FROM Employee WHERE email = %s", (email,))
+                    user = cursor.fetchone()
+            finally:
+                conn.close()
         
         if not user:
             return jsonify({'success': False, 'message': 'User not found'}), 401
@@ -215,7 +541,7 @@ def login():
             'email': user['email'],
             'exp':int((datetime.now(timezone.utc) + timedelta(hours=24)).timestamp())
         }, SECRET_KEY, algorithm='HS256')
-        print(f"Generated token for user {user['id']}: {token}")
+        logger.info("Generated token for user %s", user['id'])
         # Create response with user data
         response = make_response(jsonify({
             'success': True,
@@ -244,129 +570,240 @@ def login():
 
 
 
+# Outcomes of /api/recognize and /api/identify
+recognitions = metrics.registry.counter('face_recognitions_total', 'Recognition outcomes', ('result',))
+
+def quality_rejection(reason):
+    """422 response for a frame rejected by the quality gate"""
+    recognitions.inc('rejected')
+    return jsonify({
+        'recognized': False,
+        'reason': reason,
+        'error': quality_gate.MESSAGES[reason]
+    }), 422
+
 @app.route('/api/recognize', methods=['POST'])
+@inference_required
 @token_required
 def recognize_face(current_user_id):
     """Recognize face using stored embeddings (protected route)"""
     try:
-        print(f"Recognizing face for user: {current_user_id}")
-        data = request.json
-        image_base64 = data.get('image')
-        
-        if not image_base64:
-            return jsonify({'error': 'No image provided'}), 400
-        
-        # Convert base64 to image
+        logger.debug("Recognizing face for user %s", current_user_id)
+        # Raw image/jpeg, multipart or base64 JSON body (kept in memory, no temp file)
         try:
-            # Handle data URL (if present)
-            if ',' in image_base64:
-                image_base64 = image_base64.split(',')[1]
-            
-            # Decode base64 string
-            img_bytes = base64.b64decode(image_base64)
-            nparr = np.frombuffer(img_bytes, np.uint8)
-            img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-            
-            if img is None:
-                raise ValueError("Failed to decode image")
-                
-            print("Successfully converted base64 to image")
+            with metrics.timed('recognize', 'decode'):
+                img, _ = image_payload.from_request(request)
         except Exception as e:
-            print(f"Image conversion error: {str(e)}")
+            logger.info("Image conversion error: %s", e)
             return jsonify({'error': f'Image processing failed: {str(e)}'}), 400
         
-        # Save temporary image for embedding extraction
-        temp_dir = 'backend/temp'
-        os.makedirs(temp_dir, exist_ok=True)
-        temp_path = os.path.join(temp_dir, 'temp_capture.jpg')
-        cv2.imwrite(temp_path, img)
-        
-        if not os.path.exists(temp_path):
-            raise ValueError("Failed to save temporary image")
+        if img is None:
+            return jsonify({'error': 'No image provided'}), 400
         
-        print(f"Temporary image saved to {temp_path}")
+        # Reject unusable frames before they reach the model
+        with metrics.timed('recognize', 'quality_gate'):
+            reason = quality_gate.check(img)
+        if reason:
+            return quality_rejection(reason)
         
-        # Get current user's embedding from the database
-        conn = get_db_connection()
-        with conn.cursor() as cursor:
-            cursor.execute("""
-                SELECT id, name, department, email, face_embedding 
-                FROM Employee 
-                WHERE id = %s
-            """, (current_user_id,))
-            employee = cursor.fetchone()
-        conn.close()
+        # Resolved by token_required from the embedding cache
+        entry = g.employee
 
-        if not employee:
+        if not entry:
             return jsonify({'error': 'Employee not found'}), 404
 
-        if not employee['face_embedding']:
+        if entry['templates'] is None:
             return jsonify({'error': 'No face embedding registered for this employee'}), 400
 
+        employee = entry['profile']
+
         try:
-            # Get embedding for the temp image
+            # Get embedding for the captured frame
             # Use the same model that was used during registration
-            temp_embedding = DeepFace.represent(
-                img_path=temp_path,
-                model_name='Facenet',  # Must match your registration model
-                enforce_detection=True
-            )[0]['embedding']
-            
-            # Load stored embedding
-            stored_embedding = json.loads(employee['face_embedding'])
+            with metrics.timed('recognize', 'inference'):
+                probe = normalize(inference.embed([img], enforce_detection=True)[0])
             
-            # Calculate cosine distance
-            distance = cosine_distance(temp_embedding, stored_embedding)
-            confidence = 1 - distance
+            # Cosine similarity against every template, fused (max by default)
+            with metrics.timed('recognize', 'compare'):
+                confidence = float(face_templates.score(entry['templates'], probe))
             
-            print(f"Comparison with {employee['name']}: confidence={confidence:.2f}")
+            logger.debug("Comparison with %s: confidence=%.2f", employee['name'], confidence)
             
-            # Clean up temporary file
-            try:
-                os.remove(temp_path)
-            except:
-                pass
-            
-            if confidence > 0.6:  # Confidence threshold (adjust as needed)
-                print(f"Match found: {employee['name']} (confidence: {confidence:.2f})")
+            if confidence > MATCH_THRESHOLD:
+                logger.info("Match found: %s (confidence: %.2f)", employee['name'], confidence)
+                recognitions.inc('match')
+                # Check-in templates need a column that keeps the whole set
+                if STORES_TEMPLATE_SETS and face_templates.should_add(entry['templates'], probe, confidence):
+                    template_writer.submit(add_employee_template, current_user_id, probe, confidence)
                 return jsonify({
                     'recognized': True,
-                    'employee': {
-                        'id': employee['id'],
-                        'name': employee['name'],
-                        'department': employee['department'],
-                        'email': employee['email']
-                    },
-                    'confidence': float(confidence)
+                    'employee': employee,
+                    'confidence': confidence
                 })
             else:
-                print("No matching employee found")
+                logger.info("No matching employee found for user %s", current_user_id)
+                recognitions.inc('no_match')
                 return jsonify({
                     'recognized': False,
                     'message': 'No matching employee found'
                 })
                 
         except Exception as e:
-            print(f"Error in face recognition: {str(e)}")
-            try:
-                os.remove(temp_path)
-            except:
-                pass
+            logger.warning("Error in face recognition: %s", e)
             return jsonify({'error': f'Face recognition failed: {str(e)}'}), 500
             
     except Exception as e:
-        print(f"Error in recognize_face: {str(e)}")
+        logger.exception("Error in recognize_face")
+        return jsonify({'error': str(e)}), 500
+
+# Upper bound on frames accepted by /api/recognize/batch
+MAX_BATCH_FRAMES = 32
+
+@app.route('/api/recognize/batch', methods=['POST'])
+@inference_required
+@token_required
+def recognize_face_batch(current_user_id):
+    """Recognize several frames in one request.
+
+    In-process, the frames share one batched forward pass. With a worker pool
+    (INFERENCE_WORKERS > 0) they are spread across the workers, one pass each.
+    """
+    try:
+        data = request.json or {}
+        images_base64 = data.get('images')
+
+        if not images_base64 or not isinstance(images_base64, list):
+            return jsonify({'error': 'No images provided'}), 400
+
+        if len(images_base64) > MAX_BATCH_FRAMES:
+            return jsonify({'error': f'At most {MAX_BATCH_FRAMES} images are allowed per batch'}), 400
+
+        entry = g.employee
+
+        if not entry:
+            return jsonify({'error': 'Employee not found'}), 404
+
+        if entry['templates'] is None:
+            return jsonify({'error': 'No face embedding registered for this employee'}), 400
+
+        # Decode and quality-check every frame up front; failures are reported per index
+        frames = []
+        for image_base64 in images_base64:
+            try:
+                img = base64_to_image(image_base64)
+                if img is None:
+                    frames.append(ValueError("Failed to decode image"))
+                    continue
+                reason = quality_gate.check(img)
+                frames.append(img if not reason else reason)
+            except Exception as e:
+                frames.append(e)
+
+        decoded = [img for img in frames if not isinstance(img, (Exception, str))]
+        embedded = iter(inference.embed_many(decoded, enforce_detection=True))
+
+        results = []
+        for index, img in enumerate(frames):
+            if isinstance(img, Exception):
+                results.append({'index': index, 'error': f'Image processing failed: {str(img)}'})
+                continue
+            if isinstance(img, str):
+                results.append({
+                    'index': index,
+                    'recognized': False,
+                    'reason': img,
+                    'error': quality_gate.MESSAGES[img]
+                })
+                continue
+
+            embedding = next(embedded)
+            if isinstance(embedding, Exception):
+                results.append({'index': index, 'error': f'Face recognition failed: {str(embedding)}'})
+                continue
+
+            confidence = float(face_templates.score(entry['templates'], embedding))
+            if confidence > MATCH_THRESHOLD:
+                results.append({
+                    'index': index,
+                    'recognized': True,
+                    'employee': entry['profile'],
+                    'confidence': confidence
+                })
+            else:
+                results.append({
+                    'index': index,
+                    'recognized': False,
+                    'confidence': confidence,
+                    'message': 'No matching employee found'
+                })
+
+        return jsonify({'results': results})
+
+    except Exception as e:
+        logger.exception("Error in recognize_face_batch")
         return jsonify({'error': str(e)}), 500
 
-def cosine_distance(vec1, vec2):
-    """Calculate cosine distance between two vectors"""
-    dot_product = sum(a*b for a, b in zip(vec1, vec2))
-    norm_a = sum(a*a for a in vec1) ** 0.5
-    norm_b = sum(b*b for b in vec2) ** 0.5
-    return 1 - (dot_product / (norm_a * norm_b))
-   
+IDENTIFY_TOP_K = 5
+IDENTIFY_MAX_TOP_K = 50
+
+@app.route('/api/identify', methods=['POST'])
+@inference_required
+def identify_face():
+    """Identify whoever is in front of a kiosk camera among all enrolled employees"""
+    try:
+        try:
+            with metrics.timed('identify', 'decode'):
+                img, data = image_payload.from_request(request)
+        except Exception as e:
+            return jsonify({'error': f'Image processing failed: {str(e)}'}), 400
+        try:
+            top_k = max(1, min(int(data.get('top_k', IDENTIFY_TOP_K)), IDENTIFY_MAX_TOP_K))
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': f'Invalid top_k: {str(e)}'}), 400
+
+        if img is None:
+            return jsonify({'error': 'No image provided'}), 400
+
+        with metrics.timed('identify', 'quality_gate'):
+            reason = quality_gate.check(img)
+        if reason:
+            return quality_rejection(reason)
+
+        try:
+            with metrics.timed('identify', 'inference'):
+                probe = inference.embed([img], enforce_detection=True)[0]
+        except Exception as e:
+            return jsonify({'error': f'Face recognition failed: {str(e)}'}), 500
+
+        with metrics.timed('identify', 'search'):
+            matches = [
+                dict(profile, confidence=confidence)
+                for profile, confidence in get_gallery().search(probe, k=top_k, threshold=MATCH_THRESHOLD)
+            ]
+
+        if not matches:
+            recognitions.inc('no_match')
+            return jsonify({
+                'recognized': False,
+                'matches': [],
+                'message': 'No matching employee found'
+            })
+
+        best = matches[0]
+        recognitions.inc('match')
+        return jsonify({
+            'recognized': True,
+            'employee': {key: best[key] for key in ('id', 'name', 'department', 'email')},
+            'confidence': best['confidence'],
+            'matches': matches
+        })
+
+    except Exception as e:
+        logger.exception("Error in identify_face")
+        return jsonify({'error': str(e)}), 500
 
 @app.route('/api/register_employee', methods=['POST'])
+@inference_required
 def register_employee():
     """Register a new employee with three face images"""
     try:
@@ -397,49 +834,68 @@ def register_employee():
         # Generate employee ID and folder
         employee_id = str(uuid.uuid4())
         employee_dir = os.path.join(UPLOAD_FOLDER, employee_id)
-        os.makedirs(employee_dir, exist_ok=True)
 
-        image_paths = []
-        embeddings = []
+        # Decode uploads in memory; images are only written once embedding succeeds
+        uploads = []
+        images = []
+        with metrics.timed('register_employee', 'decode'):
+            for file in files:
+                data = file.read()
+                img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+                if img is None:
+                    return jsonify({'success': False, 'message': 'One or more images could not be decoded'}), 400
+                uploads.append(data)
+                images.append(img)
+
+        # Faces are detected in parallel, then embedded together (one pass in-process)
+        try:
+            with metrics.timed('register_employee', 'inference'):
+                embeddings = inference.embed(images)
+        except Exception as e:
+            return jsonify({'success': False, 'message': f'Face processing failed: {str(e)}'}), 500
 
-        for i, file in enumerate(files, start=1):
+        # Persist the uploads off the request's critical path
+        image_paths = []
+        for i, data in enumerate(uploads, start=1):
             filename = secure_filename(f"{name.replace(' ', '_')}_{i}.jpg")
-            filepath = os.path.join(employee_dir, filename)
-            file.save(filepath)
-            image_paths.append(filepath)
+            image_paths.append(os.path.join(employee_dir, filename))
+        image_writer.submit(save_employee_images, employee_dir, image_paths, uploads)
 
-            try:
-                result = DeepFace.represent(img_path=filepath, model_name='Facenet')[0]
-                embeddings.append(result['embedding'])
-            except Exception as e:
-                # Clean up saved files if embedding fails
-                for path in image_paths:
-                    if os.path.exists(path):
-                        os.remove(path)
-                return jsonify({'success': False, 'message': f'Face processing failed: {str(e)}'}), 500
-
-        # Average embeddings
-        avg_embedding = [sum(col) / len(col) for col in zip(*embeddings)]
-        embedding_json = json.dumps(avg_embedding)
+        # Every enrollment image is kept as a template; the gallery indexes their centroid
+        templates = normalize(embeddings)[:max(1, face_templates.TEMPLATE_CAP)]
+        stored_embedding = encode_embedding(templates)
         image = image_paths[0]
-        # Save to DB
-        conn = get_db_connection()
-        with conn.cursor() as cursor:
-            insert_query = """
-                INSERT INTO Employee (id, name, department, email, image_path, registration_date, face_embedding)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """
-            cursor.execute(insert_query, (
-                employee_id, 
-                name, 
-                department, 
-                email, 
-                image,  # Store all image paths as JSON array
-                datetime.now(), 
-                embedding_json
-            ))
-        conn.commit()
-        conn.close()
+        # Save to DB (kiosks in OFFLINE_MODE only keep the local store below)
+        if not OFFLINE_MODE:
+            with metrics.timed('register_employee', 'db_write'):
+                conn = get_db_connection()
+                try:
+                    with conn.cursor() as cursor:
+                        insert_query = """
+                            INSERT INTO Employee (id, name, department, email, image_path, registration_date, face_embedding)
+                            VALUES (%s, %s, %s, %s, %s, %s, %s)
+                        """
+                        cursor.execute(insert_query, (
+                            employee_id, 
+                            name, 
+                            department, 
+                            email, 
+                            image,  # Store all image paths as JSON array
+                            datetime.now(), 
+                            stored_embedding
+                        ))
+                    conn.commit()
+                finally:
+                    conn.close()
+
+        embedding_cache.invalidate(employee_id)
+        if gallery.loaded_at is not None:
+            gallery.add({
+                'id': employee_id,
+                'name': name,
+                'department': department,
+                'email': email
+            }, face_templates.centroid(templates))
 
         # Create employee record for response
         employee = {
@@ -451,8 +907,9 @@ def register_employee():
             'registration_date': datetime.now().isoformat()
         }
 
-        # Optionally store somewhere else
-        save_employees(employee)
+        # Local copy, with the embedding so OFFLINE_MODE can recognize this employee
+        with metrics.timed('register_employee', 'local_store'):
+            local_store.save_employee(employee, face_embedding=stored_embedding)
 
         return jsonify({
             'success': True,
@@ -466,112 +923,274 @@ def register_employee():
             'message': f'Registration failed: {str(e)}'
         }), 500
 
+ATTENDANCE_TYPES = ('check-in', 'check-out')
+
 @app.route('/api/attendance', methods=['POST'])
 @token_required
 def mark_attendance(current_user_id):
     """Mark attendance for the current authenticated user"""
     try:
-        print(f"Marking attendance for user: {current_user_id}")
         data = request.json
-        print(f"Received data: {data}")
+        logger.debug("Marking attendance for user %s: %s", current_user_id, data)
         attendance_type = data.get('type')  # 'check-in' or 'check-out'
-        confidence = data.get('confidence', 0.0)
         
         if not attendance_type:
             return jsonify({'error': 'Attendance type required'}), 400
+
+        # Validated here: a malformed event would otherwise be acknowledged and
+        # only fail later, in the background insert
+        if attendance_type not in ATTENDANCE_TYPES:
+            return jsonify({'error': f"Attendance type must be one of {', '.join(ATTENDANCE_TYPES)}"}), 400
+        try:
+            confidence = float(data.get('confidence', 0.0))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Confidence must be a number'}), 400
+        if not math.isfinite(confidence):
+            return jsonify({'error': 'Confidence must be a number'}), 400
         
-        conn = get_db_connection()
+        # Employee name was resolved by token_required, not a per-event query
+        entry = g.employee
+        if not entry:
+            return jsonify({'error': 'Employee not found'}), 404
+
+        record = {
+            'id': str(uuid.uuid4()),
+            'employee_id': current_user_id,
+            'employee_name': entry['profile']['name'],
+            'type': attendance_type,
+            'confidence': confidence,
+            'timestamp': datetime.now()
+        }
+
+        # Durably logged locally and batch-inserted into MySQL in the background
         try:
-            with conn.cursor() as cursor:
-                # 1. Get employee details
-                cursor.execute(
-                    "SELECT id, name FROM Employee WHERE id = %s",
-                    (current_user_id,)
-                )
-                employee = cursor.fetchone()
-                
-                if not employee:
-                    return jsonify({'error': 'Employee not found'}), 404
-                
-                # 2. Insert attendance record
-                attendance_id = str(uuid.uuid4())
-                insert_query = """
-                    INSERT INTO Attendance 
-                    (id, employee_id, employee_name, type, confidence, timestamp)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                """
-                cursor.execute(insert_query, (
-                    attendance_id, 
-                    current_user_id, 
-                    employee['name'],
-                    attendance_type,
-                    confidence,
-                    datetime.now()
-                ))
-                
-                # 3. Get the created record
-                cursor.execute(
-                    "SELECT * FROM Attendance WHERE id = %s",
-                    (attendance_id,)
-                )
-                new_record = cursor.fetchone()
-                
-            conn.commit()
-            
-            return jsonify({
-                'success': True,
-                'message': 'Attendance marked successfully',
-                'record': dict(new_record) if new_record else None
-            })
-            
-        except Exception as e:
-            conn.rollback()
-            return jsonify({'error': f'Database error: {str(e)}'}), 500
-        finally:
-            conn.close()
+            with metrics.timed('attendance', 'enqueue'):
+                if OFFLINE_MODE:
+                    save_attendance(record)
+                else:
+                    attendance_queue.append(record)
+        except QueueFull:
+            return jsonify({'error': 'Attendance service is busy, please retry'}), 503
+
+        return jsonify({
+            'success': True,
+            'message': 'Attendance marked successfully',
+            'record': record
+        })
             
-    except Exception as e:
-        print(f"Error marking attendance: {str(e)}")
+    except Exception:
+        logger.exception("Error marking attendance")
         return jsonify({
             'success': False,
             'error': 'Internal server error'
         }), 500
 
         
+# Page size bounds for GET /api/attendance?limit=...
+ATTENDANCE_PAGE_SIZE = 100
+ATTENDANCE_MAX_PAGE_SIZE = 1000
+
+def encode_attendance_cursor(record):
+    """Opaque keyset cursor for the (timestamp, id) of the last record on a page"""
+    raw = f"{record['timestamp'].isoformat()}|{record['id']}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def decode_attendance_cursor(cursor):
+    timestamp, record_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|', 1)
+    return datetime.fromisoformat(timestamp), record_id
+
+def build_attendance_query(args, limit=None):
+    """SELECT for attendance records newest first, honouring filters and the keyset cursor"""
+    conditions = []
+    params = []
+
+    if args.get('employee_id'):
+        conditions.append("employee_id = %s")
+        params.append(args['employee_id'])
+    if args.get('type'):
+        conditions.append("type = %s")
+        params.append(args['type'])
+    if args.get('from'):
+        conditions.append("timestamp >= %s")
+        params.append(datetime.fromisoformat(args['from']))
+    if args.get('to'):
+        conditions.append("timestamp < %s")
+        params.append(datetime.fromisoformat(args['to']))
+    if args.get('cursor'):
+        timestamp, record_id = decode_attendance_cursor(args['cursor'])
+        conditions.append("(timestamp < %s OR (timestamp = %s AND id < %s))")
+        params.extend([timestamp, timestamp, record_id])
+
+    query = """
+        SELECT id, employee_id, employee_name, type, 
+               timestamp, confidence 
+        FROM Attendance
+    """
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY timestamp DESC, id DESC"
+    if limit is not None:
+        query += " LIMIT %s"
+        params.append(limit)
+    return query, params
+
+def render_records(records, ndjson):
+    """Yield records as NDJSON lines or one JSON array"""
+    if not ndjson:
+        yield '['
+    first = True
+    for record in records:
+        if ndjson:
+            yield app.json.dumps(record) + '\n'
+        else:
+            yield ('' if first else ',') + app.json.dumps(record)
+        first = False
+    if not ndjson:
+        yield ']'
+
+def stream_attendance(conn, query, params, ndjson):
+    """Yield records from a server-side cursor as NDJSON lines or one JSON array, then release conn"""
+    try:
+        with conn.cursor(SSDictCursor) as cursor:
+            cursor.execute(query, params)
+            yield from render_records(cursor, ndjson)
+    finally:
+        conn.close()
+
+def local_attendance(args, limit=None):
+    """build_attendance_query's filters and keyset cursor against the local store (OFFLINE_MODE)"""
+    records = local_store.query_attendance(
+        employee_id=args.get('employee_id'),
+        type=args.get('type'),
+        start=datetime.fromisoformat(args['from']) if args.get('from') else None,
+        end=datetime.fromisoformat(args['to']) if args.get('to') else None,
+        before=decode_attendance_cursor(args['cursor']) if args.get('cursor') else None,
+        limit=limit
+    )
+    for record in records:
+        record['timestamp'] = datetime.fromisoformat(record['timestamp'])
+    return records
+
 @app.route('/api/attendance', methods=['GET'])
 def get_attendance():
-    """Get all attendance records from the database"""
+    """Get attendance records, newest first.
+
+    Query parameters: employee_id, type, from/to (ISO dates), and either
+    limit/cursor for keyset pages ({'records', 'next_cursor'}) or
+    format=ndjson for a streamed export. Without limit/cursor the full
+    (filtered) history is streamed as a JSON array.
+    """
     try:
+        args = request.args
+        try:
+            paginated = 'limit' in args or 'cursor' in args
+            limit = None
+            if paginated:
+                limit = max(1, min(int(args.get('limit', ATTENDANCE_PAGE_SIZE)), ATTENDANCE_MAX_PAGE_SIZE))
+            query, params = build_attendance_query(args, limit=limit + 1 if paginated else None)
+        except (ValueError, UnicodeDecodeError) as e:
+            return jsonify({'error': f'Invalid query parameter: {str(e)}'}), 400
+
+        ndjson = args.get('format') == 'ndjson'
+        mimetype = 'application/x-ndjson' if ndjson else 'application/json'
+        if OFFLINE_MODE:
+            records = local_attendance(args, limit=limit + 1 if paginated else None)
+            if not paginated:
+                return Response(render_records(records, ndjson), mimetype=mimetype)
+        elif not paginated:
+            # Checked out before the response starts, so a busy export pool is a 503, not a broken stream
+            try:
+                conn = get_export_connection()
+            except PoolTimeout:
+                return jsonify({'error': 'Too many exports in progress, please retry'}), 503
+            return Response(stream_with_context(stream_attendance(conn, query, params, ndjson)), mimetype=mimetype)
+        else:
+            conn = get_db_connection()
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(query, params)
+                    records = cursor.fetchall()
+            except Exception as e:
+                return jsonify({'error': f'Database error: {str(e)}'}), 500
+            finally:
+                conn.close()
+
+        has_more = len(records) > limit
+        records = records[:limit]
+        return jsonify({
+            'records': records,
+            'next_cursor': encode_attendance_cursor(records[-1]) if has_more else None
+        })
+            
+    except Exception:
+        logger.exception("Error fetching attendance")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/api/attendance/summary', methods=['GET'])
+def get_attendance_summary():
+    """Dashboard rollups served from AttendanceDaily.
+
+    ?date=YYYY-MM-DD (default today) returns per-employee first check-in,
+    last check-out and duration plus per-department presence for that day;
+    adding from/to also returns per-day totals for the range.
+    """
+    try:
+        args = request.args
+        try:
+            day = datetime.fromisoformat(args['date']).date() if args.get('date') else datetime.now().date()
+            start_day = datetime.fromisoformat(args['from']).date() if args.get('from') else None
+            end_day = datetime.fromisoformat(args['to']).date() if args.get('to') else day
+        except ValueError as e:
+            return jsonify({'error': f'Invalid date: {str(e)}'}), 400
+
+        # The rollups live only in MySQL; fail fast rather than wait on an unreachable server
+        if OFFLINE_MODE:
+            return jsonify({'error': 'Attendance summary is not available in offline mode'}), 503
+
         conn = get_db_connection()
         try:
             with conn.cursor() as cursor:
-                # Query to fetch all attendance records
-                cursor.execute("""
-                    SELECT id, employee_id, employee_name, type, 
-                           timestamp, confidence 
-                    FROM Attendance
-                    ORDER BY timestamp DESC
-                """)
-                attendance_records = cursor.fetchall()
-                
-                # Convert rows to dictionaries
-                records = [dict(record) for record in attendance_records]
-                
-                return jsonify(records)
-                
-        except Exception as e:
-            return jsonify({'error': f'Database error: {str(e)}'}), 500
+                summary = attendance_summary.daily_summary(cursor, day)
+                if start_day is not None:
+                    summary['days'] = attendance_summary.range_summary(cursor, start_day, end_day)
         finally:
             conn.close()
-            
-    except Exception as e:
-        print(f"Error fetching attendance: {str(e)}")
+
+        return jsonify(summary)
+
+    except Exception:
+        logger.exception("Error fetching attendance summary")
         return jsonify({'error': 'Internal server error'}), 500
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
-    return jsonify({'status': 'healthy', 'message': 'DeepFace backend is running'})
+    """Health check endpoint (503 until the face model is loaded and warm)"""
+    if not INFERENCE_ENABLED:
+        return jsonify({'status': 'healthy', 'message': 'API backend is running', 'role': APP_ROLE})
+    model_status = inference.status()
+    if not inference.is_ready():
+        return jsonify({
+            'status': 'starting' if model_status['status'] != model_manager.STATUS_FAILED else 'unhealthy',
+            'message': 'Face model is not ready',
+            'model': model_status
+        }), 503
+    return jsonify({'status': 'healthy', 'message': 'DeepFace backend is running', 'role': APP_ROLE, 'model': model_status})
+
+# Subsystem stats() counters, exported as gauges on /api/metrics (the only place they are served)
+metrics.registry.register_stats('face_db_pool', db_pool.stats)
+metrics.registry.register_stats('face_db_export_pool', export_pool.stats)
+metrics.registry.register_stats('face_embedding_cache', embedding_cache.stats)
+metrics.registry.register_stats('face_token_cache', auth.token_cache.stats)
+if INFERENCE_ENABLED:
+    metrics.registry.register_stats('face_inference', inference.stats)
+    metrics.registry.register_stats('face_quality_gate', quality_gate.stats)
+metrics.registry.register_stats('face_attendance_queue', attendance_queue.stats)
+metrics.registry.register_stats('face_local_store', local_store.stats)
+
+@app.route('/api/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Stage latencies and subsystem counters in Prometheus text format"""
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/api/logout', methods=['POST'])
 def logout():
@@ -579,6 +1198,9 @@ def logout():
         'success': True,
         'message': 'Successfully logged out'
     }))
+    token = request.cookies.get('auth_token')
+    if token:
+        auth.token_cache.discard(token)
     response.set_cookie('auth_token', '', expires=0)
     return response
 
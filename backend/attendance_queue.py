@@ -0,0 +1,293 @@
+"""
+Write-behind attendance ingestion.
+
+append() durably writes an attendance event to a local write-ahead log and
+returns immediately; a background flusher batch-inserts pending events into
+MySQL with executemany. Each process logs to its own file in the WAL
+directory and holds a lock on it. On start-up, logs left behind by crashed
+processes (unlocked files) are adopted and replayed. Inserts use INSERT IGNORE
+on the event id, so replaying an already-flushed event is harmless.
+
+If a batch fails while the connection is still alive, its rows are retried one
+at a time and any row that still fails is moved to dead_letter.jsonl in the
+WAL directory, so one bad event cannot hold up everything queued behind it.
+"""
+
+import glob
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process development server
+    fcntl = None
+
+ATTENDANCE_WAL_DIR = os.environ.get('ATTENDANCE_WAL_DIR', 'backend/data/attendance_wal')
+ATTENDANCE_FLUSH_INTERVAL = float(os.environ.get('ATTENDANCE_FLUSH_INTERVAL', '0.5'))
+ATTENDANCE_BATCH_SIZE = int(os.environ.get('ATTENDANCE_BATCH_SIZE', '500'))
+ATTENDANCE_QUEUE_MAX = int(os.environ.get('ATTENDANCE_QUEUE_MAX', '20000'))
+
+DEAD_LETTER_FILE = 'dead_letter.jsonl'
+
+INSERT_QUERY = """
+    INSERT IGNORE INTO Attendance
+    (id, employee_id, employee_name, type, confidence, timestamp)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    """Raised when too many events are waiting to be flushed (back-pressure)"""
+
+
+def _row(event):
+    return (
+        event['id'],
+        event['employee_id'],
+        event['employee_name'],
+        event['type'],
+        event['confidence'],
+        event['timestamp']
+    )
+
+
+def _to_line(event):
+    record = dict(event, timestamp=event['timestamp'].isoformat())
+    return (json.dumps(record) + '\n').encode('utf-8')
+
+
+def _from_line(line):
+    record = json.loads(line)
+    record['timestamp'] = datetime.fromisoformat(record['timestamp'])
+    return record
+
+
+class AttendanceQueue:
+    def __init__(self, connect, wal_dir=ATTENDANCE_WAL_DIR, flush_interval=ATTENDANCE_FLUSH_INTERVAL,
+                 batch_size=ATTENDANCE_BATCH_SIZE, max_pending=ATTENDANCE_QUEUE_MAX, on_flush=None):
+        self.connect = connect
+        # Called as on_flush(cursor, events) in a follow-up transaction after each inserted batch
+        self.on_flush = on_flush
+        # Events whose on_flush failed; passed again with the next flush until it succeeds
+        self._hook_retry = []
+        self.wal_dir = wal_dir
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        # Unique per process start: pids are reused after a container restart,
+        # and a crashed worker's log must be adopted, not reopened and truncated
+        self.wal_path = os.path.join(wal_dir, f"{os.getpid()}-{uuid.uuid4().hex}.wal")
+        self.dead_letter_path = os.path.join(wal_dir, DEAD_LETTER_FILE)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pending = deque()
+        self._wal = None
+        self._thread = None
+        self._counters = {
+            'appended': 0,
+            'flushed': 0,
+            'batches': 0,
+            'flush_failures': 0,
+            'rejected': 0,
+            'recovered': 0,
+            'hook_failures': 0,
+            'dead_lettered': 0,
+            'last_flush_ms': 0.0
+        }
+
+    def start(self):
+        """Open this process's log, replay orphaned logs and start the flusher"""
+        if self._thread is not None:
+            return
+        os.makedirs(self.wal_dir, exist_ok=True)
+        self._wal = open(self.wal_path, 'ab')
+        if fcntl is not None:
+            fcntl.flock(self._wal.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        self._recover()
+        self._thread = threading.Thread(target=self._run, name='attendance-flusher', daemon=True)
+        self._thread.start()
+
+    def _recover(self):
+        """Adopt logs from processes that no longer hold their lock"""
+        for path in glob.glob(os.path.join(self.wal_dir, '*.wal')):
+            if os.path.abspath(path) == os.path.abspath(self.wal_path):
+                continue
+            with open(path, 'rb') as f:
+                if fcntl is not None:
+                    try:
+                        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except OSError:
+                        continue  # owned by a live worker
+                events = []
+                for line in f:
+                    try:
+                        events.append(_from_line(line))
+                    except ValueError:
+                        break  # torn final write from the crash
+            # Move the events into this process's log before dropping the orphan
+            with self._lock:
+                for event in events:
+                    self._wal.write(_to_line(event))
+                    self._pending.append(event)
+                self._wal.flush()
+                os.fsync(self._wal.fileno())
+            os.remove(path)
+            self._counters['recovered'] += len(events)
+            logger.info("Recovered %d attendance events from %s", len(events), path)
+
+    def append(self, event):
+        """Durably log an event for asynchronous insertion; raises QueueFull under back-pressure"""
+        line = _to_line(event)
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                self._counters['rejected'] += 1
+                raise QueueFull("Attendance queue is full")
+            self._wal.write(line)
+            self._wal.flush()
+            os.fsync(self._wal.fileno())
+            self._pending.append(event)
+            self._counters['appended'] += 1
+            if len(self._pending) >= self.batch_size:
+                self._wake.set()
+
+    @staticmethod
+    def _rollback_alive(conn):
+        """Roll back after a failed statement; False if the connection itself is gone"""
+        try:
+            conn.rollback()
+            conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def _dead_letter(self, event, error):
+        record = dict(event, timestamp=str(event['timestamp']), error=str(error))
+        with open(self.dead_letter_path, 'ab') as f:
+            f.write((json.dumps(record, default=str) + '\n').encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+        self._counters['dead_lettered'] += 1
+        logger.error("Moved attendance event %s to %s: %s", event.get('id'), self.dead_letter_path, error)
+
+    def _insert_each(self, conn, events):
+        """Retry a failed batch row by row; returns the events that were written"""
+        written = []
+        for event in events:
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(INSERT_QUERY, _row(event))
+                conn.commit()
+                written.append(event)
+            except Exception as e:
+                if not self._rollback_alive(conn):
+                    raise
+                self._dead_letter(event, e)
+        return written
+
+    def _insert(self, events):
+        conn = self.connect()
+        try:
+            with conn.cursor() as cursor:
+                cursor.executemany(INSERT_QUERY, [_row(event) for event in events])
+            conn.commit()
+        except Exception:
+            # A dead connection keeps the whole batch pending; anything else is
+            # a bad row, so isolate it instead of retrying the batch forever
+            try:
+                if not self._rollback_alive(conn):
+                    raise
+                events = self._insert_each(conn, events)
+            except Exception:
+                conn.close()
+                raise
+
+        try:
+            self._run_hook(conn, events)
+        finally:
+            conn.close()
+
+    def _run_hook(self, conn, events):
+        """on_flush for events plus any left over from failed runs.
+
+        Derived data must not block ingestion, so a failure is logged and the
+        events are kept for the next flush instead of being raised.
+        """
+        if self.on_flush is None:
+            return
+        events = self._hook_retry + list(events)
+        if not events:
+            return
+        try:
+            with conn.cursor() as cursor:
+                self.on_flush(cursor, events)
+            conn.commit()
+            self._hook_retry = []
+        except Exception:
+            self._rollback_alive(conn)
+            self._counters['hook_failures'] += 1
+            logger.exception("Attendance post-flush hook failed; retrying %d events with the next flush", len(events))
+            if len(events) > self.max_pending:
+                logger.error("Dropped %d attendance events from the post-flush retry; "
+                             "run `python attendance_summary.py --backfill` to rebuild rollups",
+                             len(events) - self.max_pending)
+                events = events[-self.max_pending:]
+            self._hook_retry = events
+
+    def flush(self):
+        """Insert everything pending; returns the number of events written"""
+        written = 0
+        while True:
+            with self._lock:
+                batch = [self._pending[i] for i in range(min(self.batch_size, len(self._pending)))]
+            if not batch:
+                # Nothing new to insert: still retry a failed hook, at most once per flush
+                if self._hook_retry and not written:
+                    conn = self.connect()
+                    try:
+                        self._run_hook(conn, [])
+                    finally:
+                        conn.close()
+                return written
+
+            started = time.perf_counter()
+            self._insert(batch)
+            with self._lock:
+                for _ in batch:
+                    self._pending.popleft()
+                written += len(batch)
+                self._counters['flushed'] += len(batch)
+                self._counters['batches'] += 1
+                self._counters['last_flush_ms'] = round((time.perf_counter() - started) * 1000, 3)
+                # Everything logged so far is in MySQL: start a fresh log
+                if not self._pending:
+                    self._wal.truncate(0)
+                    self._wal.seek(0)
+
+    def _run(self):
+        backoff = self.flush_interval
+        while True:
+            self._wake.wait(backoff)
+            self._wake.clear()
+            try:
+                self.flush()
+                backoff = self.flush_interval
+            except Exception as e:
+                self._counters['flush_failures'] += 1
+                backoff = min(max(backoff * 2, self.flush_interval), 30)
+                logger.warning("Attendance flush failed, retrying in %.1fs: %s", backoff, e)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats['pending'] = len(self._pending)
+            stats['hook_retry_pending'] = len(self._hook_retry)
+        stats['max_pending'] = self.max_pending
+        return stats
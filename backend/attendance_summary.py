@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Precomputed attendance rollups for the dashboard.
+
+AttendanceDaily holds one row per employee per day with the first check-in,
+last check-out, worked duration and event counts. The attendance flusher
+calls update_rollups() right after it commits each inserted batch. For each
+(employee, day) the batch touches, the row is recomputed from that employee's
+events for that day. This is idempotent when the write-ahead log is
+replayed, and its cost does not grow with history.
+
+--backfill also adds the Attendance indexes these reads rely on:
+(employee_id, timestamp) for the per-employee-day rollup and the backfill,
+and (timestamp, id) for the keyset pages of GET /api/attendance. Like
+migrate_embeddings.py this is an explicit step, so the app's database user
+needs no ALTER privilege and workers never race to build the same index.
+
+Run from the backend directory to create the table and indexes and backfill
+history:
+    python attendance_summary.py --backfill
+"""
+
+import argparse
+import sys
+from datetime import datetime, timedelta
+
+CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS AttendanceDaily (
+        employee_id VARCHAR(64) NOT NULL,
+        day DATE NOT NULL,
+        employee_name VARCHAR(255),
+        department VARCHAR(255),
+        first_check_in DATETIME NULL,
+        last_check_out DATETIME NULL,
+        duration_seconds INT NULL,
+        check_ins INT NOT NULL DEFAULT 0,
+        check_outs INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (employee_id, day),
+        KEY idx_attendance_daily_day (day, department)
+    )
+"""
+
+ROLLUP_QUERY = """
+    INSERT INTO AttendanceDaily
+        (employee_id, day, employee_name, department, first_check_in, last_check_out,
+         duration_seconds, check_ins, check_outs)
+    SELECT
+        a.employee_id,
+        DATE(a.timestamp),
+        MAX(a.employee_name),
+        MAX(e.department),
+        MIN(CASE WHEN a.type = 'check-in' THEN a.timestamp END),
+        MAX(CASE WHEN a.type = 'check-out' THEN a.timestamp END),
+        GREATEST(0, TIMESTAMPDIFF(SECOND,
+            MIN(CASE WHEN a.type = 'check-in' THEN a.timestamp END),
+            MAX(CASE WHEN a.type = 'check-out' THEN a.timestamp END))),
+        SUM(a.type = 'check-in'),
+        SUM(a.type = 'check-out')
+    FROM Attendance a
+    LEFT JOIN Employee e ON e.id = a.employee_id
+    WHERE a.employee_id = %s AND a.timestamp >= %s AND a.timestamp < %s
+    GROUP BY a.employee_id, DATE(a.timestamp)
+    ON DUPLICATE KEY UPDATE
+        employee_name = VALUES(employee_name),
+        department = VALUES(department),
+        first_check_in = VALUES(first_check_in),
+        last_check_out = VALUES(last_check_out),
+        duration_seconds = VALUES(duration_seconds),
+        check_ins = VALUES(check_ins),
+        check_outs = VALUES(check_outs)
+"""
+
+# Index name -> columns on the Attendance table
+ATTENDANCE_INDEXES = {
+    'idx_attendance_employee_time': '(employee_id, timestamp)',
+    'idx_attendance_time_id': '(timestamp, id)'
+}
+
+_schema_ready = False
+
+
+def ensure_attendance_indexes(cursor):
+    """Add any missing ATTENDANCE_INDEXES (MySQL has no CREATE INDEX IF NOT EXISTS)"""
+    cursor.execute("""
+        SELECT DISTINCT index_name AS name
+        FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = 'Attendance'
+    """)
+    existing = {row['name'] for row in cursor.fetchall()}
+    for name, columns in ATTENDANCE_INDEXES.items():
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE Attendance ADD INDEX {name} {columns}, ALGORITHM=INPLACE, LOCK=NONE")
+
+
+def ensure_schema(cursor):
+    global _schema_ready
+    if not _schema_ready:
+        cursor.execute(CREATE_TABLE)
+        _schema_ready = True
+
+
+def _day_bounds(day):
+    start = datetime(day.year, day.month, day.day)
+    return start, start + timedelta(days=1)
+
+
+def update_rollups(cursor, events):
+    """Recompute AttendanceDaily for every (employee, day) touched by events"""
+    ensure_schema(cursor)
+    touched = {(event['employee_id'], event['timestamp'].date()) for event in events}
+    cursor.executemany(ROLLUP_QUERY, [
+        (employee_id, *_day_bounds(day)) for employee_id, day in sorted(touched)
+    ])
+
+
+def daily_summary(cursor, day):
+    """Per-employee rows and per-department presence for one day"""
+    ensure_schema(cursor)
+    cursor.execute("""
+        SELECT employee_id, employee_name, department, first_check_in, last_check_out,
+               duration_seconds, check_ins, check_outs
+        FROM AttendanceDaily
+        WHERE day = %s
+        ORDER BY employee_name
+    """, (day,))
+    employees = cursor.fetchall()
+
+    cursor.execute("""
+        SELECT department, COUNT(*) AS total
+        FROM Employee
+        GROUP BY department
+    """)
+    totals = {row['department']: row['total'] for row in cursor.fetchall()}
+
+    present = {}
+    for row in employees:
+        if row['check_ins']:
+            present[row['department']] = present.get(row['department'], 0) + 1
+
+    departments = [
+        {'department': department, 'present': present.get(department, 0), 'total': total}
+        for department, total in sorted(totals.items(), key=lambda item: str(item[0]))
+    ]
+    return {
+        'date': day.isoformat(),
+        'present': sum(present.values()),
+        'total_employees': sum(totals.values()),
+        'departments': departments,
+        'employees': employees
+    }
+
+
+def range_summary(cursor, start_day, end_day):
+    """Per-day presence totals for [start_day, end_day]"""
+    ensure_schema(cursor)
+    cursor.execute("""
+        SELECT day,
+               SUM(check_ins > 0) AS present,
+               SUM(check_ins) AS check_ins,
+               SUM(check_outs) AS check_outs,
+               AVG(duration_seconds) AS avg_duration_seconds
+        FROM AttendanceDaily
+        WHERE day >= %s AND day <= %s
+        GROUP BY day
+        ORDER BY day
+    """, (start_day, end_day))
+    return [
+        {
+            'date': row['day'].isoformat(),
+            'present': int(row['present'] or 0),
+            'check_ins': int(row['check_ins'] or 0),
+            'check_outs': int(row['check_outs'] or 0),
+            'avg_duration_seconds': float(row['avg_duration_seconds']) if row['avg_duration_seconds'] is not None else None
+        }
+        for row in cursor.fetchall()
+    ]
+
+
+def backfill(conn, batch_size=1000):
+    """Add the Attendance indexes and rebuild AttendanceDaily from the full history"""
+    with conn.cursor() as cursor:
+        ensure_schema(cursor)
+        ensure_attendance_indexes(cursor)
+        cursor.execute("SELECT DISTINCT employee_id, DATE(timestamp) AS day FROM Attendance")
+        pairs = [(row['employee_id'], row['day']) for row in cursor.fetchall()]
+    conn.commit()
+
+    for start in range(0, len(pairs), batch_size):
+        with conn.cursor() as cursor:
+            cursor.executemany(ROLLUP_QUERY, [
+                (employee_id, *_day_bounds(day)) for employee_id, day in pairs[start:start + batch_size]
+            ])
+        conn.commit()
+        print(f"Rolled up {min(start + batch_size, len(pairs))}/{len(pairs)} employee-days")
+    return len(pairs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backfill', action='store_true', help='create AttendanceDaily and the Attendance indexes, then rebuild it from history')
+    args = parser.parse_args()
+
+    if not args.backfill:
+        parser.print_help()
+        return 1
+
+    from database import connect
+
+    conn = connect()
+    try:
+        backfill(conn)
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
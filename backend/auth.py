@@ -0,0 +1,100 @@
+"""
+JWT verification with a small cache of already-verified tokens.
+
+Every check-in sends the same auth_token cookie, so token_required would
+otherwise repeat the HS256 signature check on every request. Verified
+claims are kept under the token's SHA-256 digest (the raw token is never
+held as a key) until the token's own exp. The cache is bounded and evicts
+least-recently-used entries.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import jwt
+
+TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', '4096'))
+# Upper bound for tokens without an exp claim
+TOKEN_CACHE_MAX_TTL = float(os.environ.get('TOKEN_CACHE_MAX_TTL', '300'))
+
+logger = logging.getLogger(__name__)
+
+
+class TokenCache:
+    """Thread-safe LRU of verified claims by token digest, expiring at the token's exp"""
+
+    def __init__(self, max_size=TOKEN_CACHE_SIZE, max_ttl=TOKEN_CACHE_MAX_TTL):
+        self.max_size = max_size
+        self.max_ttl = max_ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._counters = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0}
+
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode('utf-8')).digest()
+
+    def get(self, token):
+        key = self._key(token)
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self._counters['misses'] += 1
+                return None
+            expires_at, claims = item
+            if expires_at <= time.time():
+                del self._entries[key]
+                self._counters['expired'] += 1
+                self._counters['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters['hits'] += 1
+            return claims
+
+    def put(self, token, claims):
+        now = time.time()
+        expires_at = now + self.max_ttl
+        if 'exp' in claims:
+            expires_at = min(expires_at, float(claims['exp']))
+        if expires_at <= now:
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (expires_at, claims)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._counters['evictions'] += 1
+
+    def discard(self, token):
+        with self._lock:
+            self._entries.pop(self._key(token), None)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats['size'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats.update({
+            'max_size': self.max_size,
+            'hit_ratio': round(stats['hits'] / lookups, 4) if lookups else 0.0
+        })
+        return stats
+
+
+token_cache = TokenCache()
+
+
+def verify_token(token, secret, algorithms=('HS256',)):
+    """Claims of a valid token; raises jwt.ExpiredSignatureError / jwt.InvalidTokenError"""
+    claims = token_cache.get(token)
+    if claims is not None:
+        return claims
+    claims = jwt.decode(token, secret, algorithms=list(algorithms))
+    token_cache.put(token, claims)
+    logger.debug("Verified token for user %s", claims.get('user_id'))
+    return claims
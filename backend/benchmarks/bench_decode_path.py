@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark the per-request cost of the old temp_capture.jpg round-trip
+against the in-memory decode-to-embedding path.
+
+Run from the backend directory:
+    python benchmarks/bench_decode_path.py [--iterations 50] [--embed]
+"""
+
+import argparse
+import base64
+import glob
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+IMAGES_GLOB = 'backend/employee_images/*/*.jpg'
+
+
+def load_frames():
+    """Load the sample employee images as base64 data URLs"""
+    frames = []
+    for path in sorted(glob.glob(IMAGES_GLOB)):
+        with open(path, 'rb') as f:
+            frames.append('data:image/jpeg;base64,' + base64.b64encode(f.read()).decode('ascii'))
+    return frames
+
+
+def decode(image_base64):
+    if ',' in image_base64:
+        image_base64 = image_base64.split(',')[1]
+    return cv2.imdecode(np.frombuffer(base64.b64decode(image_base64), np.uint8), cv2.IMREAD_COLOR)
+
+
+def temp_file_path(image_base64, temp_path, embed=None):
+    """Old path: decode, write temp JPEG, let the model re-read and re-decode it"""
+    img = decode(image_base64)
+    cv2.imwrite(temp_path, img)
+    if embed is not None:
+        return embed([temp_path])
+    return cv2.imread(temp_path)
+
+
+def in_memory_path(image_base64, embed=None):
+    """New path: decode once and hand the array straight to the model"""
+    img = decode(image_base64)
+    if embed is not None:
+        return embed([img])
+    return img
+
+
+def measure(fn, frames, iterations):
+    timings = []
+    for i in range(iterations):
+        frame = frames[i % len(frames)]
+        started = time.perf_counter()
+        fn(frame)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings = np.array(timings)
+    return {
+        'mean_ms': float(timings.mean()),
+        'p50_ms': float(np.percentile(timings, 50)),
+        'p95_ms': float(np.percentile(timings, 95))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--embed', action='store_true', help='include the Facenet embedding stage')
+    args = parser.parse_args()
+
+    frames = load_frames()
+    if not frames:
+        print(f"No sample images found under {IMAGES_GLOB}")
+        return 1
+
+    embed = None
+    if args.embed:
+        import model_manager
+        model_manager.load()
+        embed = model_manager.embed
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = os.path.join(temp_dir, 'temp_capture.jpg')
+        # One warm-up pass for each path
+        temp_file_path(frames[0], temp_path, embed)
+        in_memory_path(frames[0], embed)
+
+        old = measure(lambda frame: temp_file_path(frame, temp_path, embed), frames, args.iterations)
+        new = measure(lambda frame: in_memory_path(frame, embed), frames, args.iterations)
+
+    print(f"{len(frames)} sample frames, {args.iterations} iterations, embed={args.embed}")
+    print(f"{'path':<12}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for label, result in (('temp file', old), ('in memory', new)):
+        print(f"{label:<12}{result['mean_ms']:>10.2f}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}")
+    print(f"Saved per request: {old['mean_ms'] - new['mean_ms']:.2f} ms (mean)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Compare detector backends and detection downscaling on the sample images.
+
+For every backend / short-side combination this times detection+alignment
+and the Facenet embedding per image. It then scores match accuracy on the
+images in backend/employee_images: each image is compared with the mean
+embedding of every other folder. Folders whose images share a name prefix
+(e.g. vimal_*.jpg) are the same person, so those pairs should score above
+MATCH_THRESHOLD and the rest below it.
+
+Run from the backend directory:
+    python benchmarks/bench_detectors.py [--backends opencv haar ssd] [--short-sides 0 480 360]
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import model_manager  # noqa: E402
+from gallery import normalize  # noqa: E402
+
+IMAGES_GLOB = 'backend/employee_images/*/*.jpg'
+MATCH_THRESHOLD = 0.6
+
+
+def load_samples():
+    """[(folder, person, BGR image)] for every sample image"""
+    samples = []
+    for path in sorted(glob.glob(IMAGES_GLOB)):
+        img = cv2.imread(path)
+        if img is None:
+            continue
+        folder = os.path.basename(os.path.dirname(path))
+        person = os.path.basename(path).rsplit('_', 1)[0]
+        samples.append((folder, person, img))
+    return samples
+
+
+def run(samples, backend, short_side):
+    detect_ms = []
+    embed_ms = []
+    embeddings = []
+    for folder, person, img in samples:
+        started = time.perf_counter()
+        try:
+            crop = model_manager.extract_face(img, enforce_detection=True, detector=backend, short_side=short_side)[0]
+        except Exception:
+            embeddings.append(None)
+            continue
+        detected = time.perf_counter()
+        embedding = model_manager.embed_crops([crop])[0]
+        detect_ms.append((detected - started) * 1000)
+        embed_ms.append((time.perf_counter() - detected) * 1000)
+        embeddings.append(normalize(embedding))
+
+    folders = sorted({folder for folder, _, _ in samples})
+    people = {folder: person for folder, person, _ in samples}
+    correct = 0
+    pairs = 0
+    for (folder, person, _), embedding in zip(samples, embeddings):
+        if embedding is None:
+            continue
+        for other in folders:
+            # Templates exclude the probe image itself
+            others = [e for (f, _, _), e in zip(samples, embeddings) if f == other and e is not None and e is not embedding]
+            if not others:
+                continue
+            score = float(normalize(np.mean(others, axis=0)) @ embedding)
+            correct += int((score > MATCH_THRESHOLD) == (people[other] == person))
+            pairs += 1
+
+    return {
+        'detected': sum(e is not None for e in embeddings),
+        'detect_ms': float(np.median(detect_ms)) if detect_ms else float('nan'),
+        'embed_ms': float(np.median(embed_ms)) if embed_ms else float('nan'),
+        'accuracy': correct / pairs if pairs else float('nan')
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backends', nargs='+', default=['opencv', 'haar', 'yunet', 'ssd'])
+    parser.add_argument('--short-sides', nargs='+', type=int, default=[0, 480, 360])
+    args = parser.parse_args()
+
+    samples = load_samples()
+    if not samples:
+        print(f"No sample images found under {IMAGES_GLOB}")
+        return 1
+
+    model_manager.load()
+    print(f"{len(samples)} sample images, threshold {MATCH_THRESHOLD}")
+    print(f"{'backend':<12}{'short side':>11}{'detected':>10}{'detect ms':>11}{'embed ms':>10}{'accuracy':>10}")
+    for backend in args.backends:
+        for short_side in args.short_sides:
+            try:
+                result = run(samples, backend, short_side)
+            except Exception as e:
+                print(f"{backend:<12}{short_side:>11}  unavailable: {str(e)}")
+                break
+            print(f"{backend:<12}{short_side:>11}{result['detected']:>7}/{len(samples):<2}"
+                  f"{result['detect_ms']:>11.1f}{result['embed_ms']:>10.1f}{result['accuracy']:>10.3f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
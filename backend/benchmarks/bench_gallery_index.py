@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Recall/latency benchmark of the IVF gallery index against exact search.
+
+Uses synthetic clustered 128-d embeddings (Facenet's size) so it runs fully
+offline. Queries are noisy copies of enrolled vectors, the way a new capture
+relates to an employee's enrollment embedding.
+
+Run from the backend directory:
+    python benchmarks/bench_gallery_index.py [--size 100000] [--queries 500] [--nlist 316] [--nprobe 8 16 32]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gallery import normalize  # noqa: E402
+from gallery_index import ExactIndex, IVFIndex  # noqa: E402
+
+
+def synthetic_gallery(size, dim, clusters, rng):
+    centers = normalize(rng.standard_normal((clusters, dim)))
+    members = rng.integers(0, clusters, size)
+    vectors = normalize(centers[members] + 0.35 * rng.standard_normal((size, dim)))
+    return [f"emp-{i}" for i in range(size)], vectors
+
+
+def time_searches(index, probes, k):
+    timings = []
+    results = []
+    for probe in probes:
+        started = time.perf_counter()
+        results.append([employee_id for employee_id, _ in index.search(probe, k)])
+        timings.append((time.perf_counter() - started) * 1000)
+    return results, np.array(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=100000)
+    parser.add_argument('--dim', type=int, default=128)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--nlist', type=int, default=None, help='IVF lists (default: the index default)')
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[1, 4, 8, 16, 32])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    ids, vectors = synthetic_gallery(args.size, args.dim, max(1, args.size // 50), rng)
+    targets = rng.integers(0, args.size, args.queries)
+    probes = normalize(vectors[targets] + 0.05 * rng.standard_normal((args.queries, args.dim)))
+
+    exact = ExactIndex()
+    started = time.perf_counter()
+    exact.build(ids, vectors)
+    exact_build = time.perf_counter() - started
+    truth, exact_ms = time_searches(exact, probes, args.k)
+
+    ivf = IVFIndex(nlist=args.nlist)
+    started = time.perf_counter()
+    ivf.build(ids, vectors)
+    ivf_build = time.perf_counter() - started
+
+    print(f"gallery={args.size} dim={args.dim} queries={args.queries} k={args.k} nlist={len(ivf.centroids)}")
+    print(f"{'index':<14}{'build s':>9}{'p50 ms':>9}{'p95 ms':>9}{'recall@1':>10}{'recall@k':>10}")
+    print(f"{'exact':<14}{exact_build:>9.2f}{np.percentile(exact_ms, 50):>9.3f}"
+          f"{np.percentile(exact_ms, 95):>9.3f}{1.0:>10.3f}{1.0:>10.3f}")
+
+    for nprobe in args.nprobe:
+        ivf.nprobe = nprobe
+        found, ivf_ms = time_searches(ivf, probes, args.k)
+        recall_1 = np.mean([bool(f) and f[0] == t[0] for f, t in zip(found, truth)])
+        recall_k = np.mean([len(set(f) & set(t)) / len(t) for f, t in zip(found, truth)])
+        print(f"{f'ivf nprobe={nprobe}':<14}{ivf_build:>9.2f}{np.percentile(ivf_ms, 50):>9.3f}"
+              f"{np.percentile(ivf_ms, 95):>9.3f}{recall_1:>10.3f}{recall_k:>10.3f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark and load test for the recognition backend.
+
+Runs the real Flask app in-process against benchmarks/fake_db.py behind
+get_db_connection, so neither MySQL nor the network is needed (the Facenet
+weights must already be cached locally). The sample images under
+backend/employee_images are used as enrollment and probe frames. Sections:
+
+    micro    decode, quality gate, detection, Facenet embedding, 1:1 compare
+             and a 1:N compare against a synthetic gallery
+    load     concurrent /api/register_employee, /api/recognize and
+             /api/attendance requests with latency percentiles and throughput
+    memory   peak RSS of this process and of any inference worker processes
+
+Results are written as JSON so runs can be diffed. Run from the backend
+directory:
+    python benchmarks/bench_load.py [--concurrency 8] [--requests 200] [--output bench_load.json]
+"""
+
+import argparse
+import glob
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from fake_db import FakeDatabase  # noqa: E402
+
+IMAGES_GLOB = 'backend/employee_images/*/*.jpg'
+
+
+def load_samples():
+    """{folder: [jpeg bytes]} for the sample images, read before leaving the backend directory"""
+    samples = defaultdict(list)
+    for path in sorted(glob.glob(IMAGES_GLOB)):
+        with open(path, 'rb') as f:
+            samples[os.path.basename(os.path.dirname(path))].append(f.read())
+    return dict(samples)
+
+
+def summarize(timings_ms):
+    timings = np.array(timings_ms, dtype=np.float64)
+    if not len(timings):
+        return {'count': 0}
+    return {
+        'count': int(len(timings)),
+        'mean_ms': round(float(timings.mean()), 3),
+        'p50_ms': round(float(np.percentile(timings, 50)), 3),
+        'p90_ms': round(float(np.percentile(timings, 90)), 3),
+        'p95_ms': round(float(np.percentile(timings, 95)), 3),
+        'p99_ms': round(float(np.percentile(timings, 99)), 3),
+        'max_ms': round(float(timings.max()), 3)
+    }
+
+
+def time_calls(fn, inputs, iterations):
+    fn(inputs[0])
+    timings = []
+    for i in range(iterations):
+        item = inputs[i % len(inputs)]
+        started = time.perf_counter()
+        fn(item)
+        timings.append((time.perf_counter() - started) * 1000)
+    return summarize(timings)
+
+
+def microbenchmarks(backend, jpegs, iterations, gallery_size):
+    import image_payload
+    import model_manager
+    import quality_gate
+    from gallery import normalize
+
+    images = [image_payload.decode_bytes(jpeg) for jpeg in jpegs]
+    crops = [item for item in model_manager.detect(images, enforce_detection=False) if not isinstance(item, Exception)]
+    rng = np.random.default_rng(0)
+    probe = normalize(rng.standard_normal(128).astype(np.float32))
+    template = normalize(rng.standard_normal(128).astype(np.float32))
+    matrix = normalize(rng.standard_normal((gallery_size, 128)).astype(np.float32))
+
+    return {
+        'decode': time_calls(image_payload.decode_bytes, jpegs, iterations),
+        'quality_gate': time_calls(quality_gate.check, images, iterations),
+        'detect': time_calls(lambda img: model_manager.detect([img], enforce_detection=False), images, iterations),
+        'embed_crop': time_calls(lambda crop: model_manager.embed_crops([crop]), crops, iterations) if crops else None,
+        'embed_end_to_end': time_calls(lambda img: backend.inference.embed([img], enforce_detection=False), images, iterations),
+        'compare_1to1': time_calls(lambda _: float(probe @ template), [None], iterations),
+        f'compare_1to{gallery_size}': time_calls(lambda _: np.argmax(matrix @ probe), [None], iterations)
+    }
+
+
+def run_load(backend, make_request, total, concurrency):
+    """Issue total requests from concurrency threads; latency percentiles, throughput and status counts"""
+    timings = []
+    statuses = Counter()
+    lock = threading.Lock()
+
+    def worker(indexes):
+        client = backend.app.test_client()
+        for i in indexes:
+            started = time.perf_counter()
+            response = make_request(client, i)
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                timings.append(elapsed)
+                statuses[response.status_code] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(worker, [range(start, total, concurrency) for start in range(concurrency)]))
+    wall = time.perf_counter() - started
+
+    result = summarize(timings)
+    result.update({
+        'concurrency': concurrency,
+        'throughput_rps': round(total / wall, 3) if wall else None,
+        'status_counts': {str(code): count for code, count in sorted(statuses.items())}
+    })
+    return result
+
+
+def auth_header(backend, employee_id):
+    import jwt
+    token = jwt.encode({
+        'user_id': employee_id,
+        'email': f'{employee_id}@bench.local',
+        'exp': int((datetime.now(timezone.utc) + timedelta(hours=1)).timestamp())
+    }, backend.SECRET_KEY, algorithm='HS256')
+    return {'Cookie': f'auth_token={token}'}
+
+
+def load_tests(backend, samples, args):
+    folders = sorted(samples)
+    enrolled = []
+    enrolled_lock = threading.Lock()
+
+    def register(client, i):
+        folder = folders[i % len(folders)]
+        images = [samples[folder][k % len(samples[folder])] for k in range(3)]
+        response = client.post('/api/register_employee', content_type='multipart/form-data', data={
+            'name': f'bench {folder[:8]} {i}',
+            'department': 'Benchmark',
+            'email': f'bench-{i}@bench.local',
+            'images': [(io.BytesIO(jpeg), f'{k}.jpg') for k, jpeg in enumerate(images)]
+        })
+        if response.status_code == 201:
+            with enrolled_lock:
+                enrolled.append((response.get_json()['employee']['id'], folder))
+        return response
+
+    results = {'register_employee': run_load(backend, register, args.register_requests, args.concurrency)}
+    if not enrolled:
+        print("No employee could be registered; skipping recognize/attendance")
+        return results
+
+    headers = {employee_id: auth_header(backend, employee_id) for employee_id, _ in enrolled}
+
+    def recognize(client, i):
+        employee_id, folder = enrolled[i % len(enrolled)]
+        jpeg = samples[folder][i % len(samples[folder])]
+        return client.post('/api/recognize', data=jpeg, content_type='image/jpeg', headers=headers[employee_id])
+
+    def attendance(client, i):
+        employee_id, _ = enrolled[i % len(enrolled)]
+        return client.post('/api/attendance', json={'type': 'check-in' if i % 2 == 0 else 'check-out',
+                                                     'confidence': 0.9}, headers=headers[employee_id])
+
+    results['recognize'] = run_load(backend, recognize, args.requests, args.concurrency)
+    results['attendance'] = run_load(backend, attendance, args.requests, args.concurrency)
+    return results
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    unit = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return {
+        'self': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit, 1),
+        'children': round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / unit, 1)
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200, help='requests per recognize/attendance run')
+    parser.add_argument('--register-requests', type=int, default=24)
+    parser.add_argument('--iterations', type=int, default=50, help='iterations per microbenchmark')
+    parser.add_argument('--gallery-size', type=int, default=10000)
+    parser.add_argument('--db-latency-ms', type=float, default=2.0, help='simulated round trip per statement')
+    parser.add_argument('--model-timeout', type=float, default=300)
+    parser.add_argument('--output', default='bench_load.json')
+    parser.add_argument('--keep-workdir', action='store_true')
+    args = parser.parse_args()
+
+    samples = load_samples()
+    if not samples:
+        print(f"No sample images found under {IMAGES_GLOB}")
+        return 1
+    output = os.path.abspath(args.output)
+
+    # The app writes relative to its working directory (backend/data, images,
+    # WAL, local store); keep all of that in a throwaway directory
+    workdir = tempfile.mkdtemp(prefix='bench_load_')
+    os.chdir(workdir)
+
+    import database
+    from db_pool import ConnectionPool
+    fake = FakeDatabase(latency_ms=args.db_latency_ms)
+    database.db_pool = ConnectionPool(fake.connect)
+    database.export_pool = ConnectionPool(fake.connect, max_size=database.DB_EXPORT_POOL_SIZE)
+
+    started = time.perf_counter()
+    import app as backend
+    import_seconds = time.perf_counter() - started
+
+    deadline = time.time() + args.model_timeout
+    while not backend.inference.is_ready() and time.time() < deadline:
+        time.sleep(0.2)
+    if not backend.inference.is_ready():
+        print(f"Inference backend not ready: {backend.inference.status()}")
+        return 1
+    ready_seconds = time.perf_counter() - started
+
+    jpegs = [jpeg for folder in sorted(samples) for jpeg in samples[folder]]
+    print(f"{len(jpegs)} sample images in {len(samples)} folders; running microbenchmarks")
+    micro = microbenchmarks(backend, jpegs, args.iterations, args.gallery_size)
+    print("Running load tests")
+    load = load_tests(backend, samples, args)
+
+    # Let the write-behind attendance queue drain into the fake database
+    for _ in range(50):
+        if not backend.attendance_queue.stats().get('pending'):
+            break
+        time.sleep(0.1)
+
+    results = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'args': vars(args),
+            'env': {key: os.environ[key] for key in sorted(os.environ)
+                    if key.startswith(('INFERENCE_', 'FACE_', 'GALLERY_', 'QUALITY_', 'EMBEDDING_', 'DB_POOL_'))}
+        },
+        'startup': {'import_seconds': round(import_seconds, 3), 'ready_seconds': round(ready_seconds, 3)},
+        'micro': micro,
+        'load': load,
+        'database': fake.stats(),
+        'inference': backend.inference.stats(),
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2, default=str)
+
+    print(f"{'run':<20}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'rps':>9}")
+    for name, result in load.items():
+        print(f"{name:<20}{result.get('count', 0):>7}{result.get('p50_ms', 0):>10.1f}"
+              f"{result.get('p95_ms', 0):>10.1f}{result.get('p99_ms', 0):>10.1f}{result.get('throughput_rps') or 0:>9.1f}")
+    print(f"Peak RSS: {results['peak_rss_mb']['self']} MiB (workers {results['peak_rss_mb']['children']} MiB)")
+    print(f"Results written to {output}")
+
+    if not args.keep_workdir:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
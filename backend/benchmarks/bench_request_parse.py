@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark request parse + decode time for the three image transports:
+base64 JSON (the original format), a raw image/jpeg body and multipart
+form data. Each iteration builds a Flask request from the encoded body and
+runs image_payload.from_request on it, so it measures parsing and decoding
+only, not the network.
+
+Run from the backend directory:
+    python benchmarks/bench_request_parse.py [--iterations 200]
+"""
+
+import argparse
+import base64
+import glob
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from flask import Flask, request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import image_payload  # noqa: E402
+
+IMAGES_GLOB = 'backend/employee_images/*/*.jpg'
+BOUNDARY = 'benchboundary'
+
+
+def load_jpegs():
+    jpegs = []
+    for path in sorted(glob.glob(IMAGES_GLOB)):
+        with open(path, 'rb') as f:
+            jpegs.append(f.read())
+    return jpegs
+
+
+def base64_body(jpeg):
+    body = json.dumps({'image': 'data:image/jpeg;base64,' + base64.b64encode(jpeg).decode('ascii')}).encode('utf-8')
+    return body, 'application/json'
+
+
+def raw_body(jpeg):
+    return jpeg, 'image/jpeg'
+
+
+def multipart_body(jpeg):
+    body = (
+        f'--{BOUNDARY}\r\n'
+        'Content-Disposition: form-data; name="image"; filename="frame.jpg"\r\n'
+        'Content-Type: image/jpeg\r\n\r\n'
+    ).encode('ascii') + jpeg + f'\r\n--{BOUNDARY}--\r\n'.encode('ascii')
+    return body, f'multipart/form-data; boundary={BOUNDARY}'
+
+
+def measure(app, bodies, iterations):
+    timings = []
+    for i in range(iterations):
+        body, content_type = bodies[i % len(bodies)]
+        with app.test_request_context('/api/recognize', method='POST', data=body, content_type=content_type):
+            started = time.perf_counter()
+            img, _ = image_payload.from_request(request)
+            timings.append((time.perf_counter() - started) * 1000)
+        assert img is not None
+    timings = np.array(timings)
+    return {
+        'mean_ms': float(timings.mean()),
+        'p50_ms': float(np.percentile(timings, 50)),
+        'p95_ms': float(np.percentile(timings, 95))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    jpegs = load_jpegs()
+    if not jpegs:
+        print(f"No sample images found under {IMAGES_GLOB}")
+        return 1
+
+    app = Flask(__name__)
+    transports = (('base64 json', base64_body), ('raw jpeg', raw_body), ('multipart', multipart_body))
+
+    print(f"{len(jpegs)} sample frames, {args.iterations} iterations")
+    print(f"{'transport':<14}{'body KiB':>10}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for label, build in transports:
+        bodies = [build(jpeg) for jpeg in jpegs]
+        measure(app, bodies, 1)
+        result = measure(app, bodies, args.iterations)
+        size = np.mean([len(body) for body, _ in bodies]) / 1024
+        print(f"{label:<14}{size:>10.1f}{result['mean_ms']:>10.2f}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Cold-start time and memory of the backend for each APP_ROLE.
+
+Every role is started in a fresh interpreter that imports app.py from a
+throwaway working directory. The child reports:
+- the import time
+- the time until inference is ready (roles that load the model)
+- peak RSS
+- whether TensorFlow / deepface / OpenCV were imported
+Importing app.py does not connect to MySQL, so this runs offline. The 'all'
+role needs the Facenet weights cached locally.
+
+Run from the backend directory:
+    python benchmarks/bench_startup.py [--roles api all] [--runs 3] [--output bench_startup.json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import json, resource, sys, time
+started = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+import app
+imported = time.perf_counter() - started
+ready = None
+if app.INFERENCE_ENABLED:
+    deadline = time.time() + float(sys.argv[2])
+    while not app.inference.is_ready() and time.time() < deadline:
+        time.sleep(0.05)
+    ready = time.perf_counter() - started if app.inference.is_ready() else None
+unit = 1024 * 1024 if sys.platform == 'darwin' else 1024
+print(json.dumps({
+    'import_seconds': imported,
+    'ready_seconds': ready,
+    'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit,
+    'tensorflow_loaded': 'tensorflow' in sys.modules,
+    'deepface_loaded': 'deepface' in sys.modules,
+    'opencv_loaded': 'cv2' in sys.modules
+}))
+"""
+
+
+def measure(role, model_timeout):
+    env = dict(os.environ, APP_ROLE=role, LOG_LEVEL='WARNING')
+    with tempfile.TemporaryDirectory(prefix='bench_startup_') as workdir:
+        completed = subprocess.run([sys.executable, '-c', CHILD, BACKEND_DIR, str(model_timeout)],
+                                   cwd=workdir, env=env, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else 'failed')
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--roles', nargs='+', default=['api', 'all'])
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--model-timeout', type=float, default=300)
+    parser.add_argument('--output', default='bench_startup.json')
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'role':<10}{'import s':>10}{'ready s':>10}{'peak RSS MiB':>14}{'tensorflow':>12}{'opencv':>8}")
+    for role in args.roles:
+        try:
+            runs = [measure(role, args.model_timeout) for _ in range(args.runs)]
+        except Exception as e:
+            print(f"{role:<10}  failed: {str(e)}")
+            results[role] = {'error': str(e)}
+            continue
+        ready = [run['ready_seconds'] for run in runs if run['ready_seconds'] is not None]
+        results[role] = {
+            'runs': runs,
+            'import_seconds_median': float(np.median([run['import_seconds'] for run in runs])),
+            'ready_seconds_median': float(np.median(ready)) if ready else None,
+            'peak_rss_mb_median': float(np.median([run['peak_rss_mb'] for run in runs])),
+            'tensorflow_loaded': any(run['tensorflow_loaded'] for run in runs),
+            'opencv_loaded': any(run['opencv_loaded'] for run in runs)
+        }
+        summary = results[role]
+        ready_text = f"{summary['ready_seconds_median']:.2f}" if summary['ready_seconds_median'] is not None else '-'
+        print(f"{role:<10}{summary['import_seconds_median']:>10.2f}{ready_text:>10}"
+              f"{summary['peak_rss_mb_median']:>14.1f}{str(summary['tensorflow_loaded']):>12}"
+              f"{str(summary['opencv_loaded']):>8}")
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""
+In-process stand-in for MySQL used by the offline benchmarks.
+
+FakeDatabase.connect returns pymysql-like connections, so it can sit behind
+db_pool.ConnectionPool and therefore behind get_db_connection. It answers
+the queries on the recognition, registration and attendance paths: Employee
+lookups by id and email, the gallery scan, Employee inserts and the
+attendance batch insert. Every other statement (rollups, DDL) is accepted
+and returns no rows. An optional per-statement latency models the network
+round trip to the real database.
+"""
+
+import re
+import threading
+import time
+from collections import Counter
+
+_COLUMNS = re.compile(r'\(([^)]*)\)\s*VALUES', re.IGNORECASE)
+
+
+def _normalize(query):
+    return ' '.join(query.split())
+
+
+class FakeDatabase:
+    def __init__(self, latency_ms=0.0):
+        self.latency = latency_ms / 1000.0
+        self.lock = threading.Lock()
+        self.employees = {}
+        self.attendance = {}
+        self.statements = Counter()
+
+    def connect(self):
+        return FakeConnection(self)
+
+    def add_employee(self, row):
+        with self.lock:
+            self.employees[row['id']] = dict(row)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'employees': len(self.employees),
+                'attendance': len(self.attendance),
+                'statements': dict(self.statements)
+            }
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+
+    def cursor(self, cursor_class=None):
+        return FakeCursor(self.db)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def ping(self, reconnect=False):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def close(self):
+        self._rows = []
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def executemany(self, query, seq_of_params):
+        for params in seq_of_params:
+            self._execute(_normalize(query), params)
+        self._wait()
+        return len(seq_of_params)
+
+    def execute(self, query, params=()):
+        self._execute(_normalize(query), params)
+        self._wait()
+        return len(self._rows)
+
+    def _wait(self):
+        if self.db.latency:
+            time.sleep(self.db.latency)
+
+    def _execute(self, query, params):
+        db = self.db
+        upper = query.upper()
+        with db.lock:
+            if upper.startswith('SELECT') and 'FROM EMPLOYEE' in upper:
+                db.statements['select_employee'] += 1
+                if 'WHERE ID = %S' in upper:
+                    rows = [db.employees.get(params[0])]
+                elif 'WHERE EMAIL = %S' in upper:
+                    rows = [row for row in db.employees.values() if row.get('email') == params[0]][:1]
+                elif 'FACE_EMBEDDING IS NOT NULL' in upper:
+                    rows = [row for row in db.employees.values() if row.get('face_embedding') is not None]
+                else:
+                    rows = list(db.employees.values())
+                self._rows = [dict(row) for row in rows if row is not None]
+            elif upper.startswith('INSERT INTO EMPLOYEE'):
+                db.statements['insert_employee'] += 1
+                columns = [column.strip() for column in _COLUMNS.search(query).group(1).split(',')]
+                row = dict(zip(columns, params))
+                db.employees[row['id']] = row
+                self._rows = []
+            elif upper.startswith('INSERT IGNORE INTO ATTENDANCE'):
+                db.statements['insert_attendance'] += 1
+                columns = [column.strip() for column in _COLUMNS.search(query).group(1).split(',')]
+                row = dict(zip(columns, params))
+                db.attendance.setdefault(row['id'], row)
+                self._rows = []
+            else:
+                db.statements['other'] += 1
+                self._rows = []
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Bulk-enroll employees from a directory tree or a CSV manifest.
+
+Directory layout (one folder per employee, the folder name is the id):
+
+    <images-dir>/<employee id>/*.jpg
+
+The name is taken from the image file names (``john_1.jpg`` -> ``john``).
+Use a manifest to also set department and email. The manifest is a CSV with
+columns ``id,name,department,email,images``, where ``images`` is a
+``;``-separated list of paths. Without ``images`` the files are read from
+``<images-dir>/<id>/``. Without ``id`` a stable id is derived from the email.
+
+Images are decoded, detected and embedded by a pool of worker processes that
+each load Facenet once. Rows are written with batched executemany inserts.
+Every committed id is appended to a checkpoint file, so an interrupted import
+resumes where it stopped.
+
+Run from the backend directory:
+    python bulk_enroll.py --images-dir backend/employee_images [--manifest staff.csv] [--workers 4]
+"""
+
+import argparse
+import csv
+import glob
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+from multiprocessing import Pool
+
+import cv2
+import numpy as np
+
+import embedding_codec
+from face_templates import TEMPLATE_CAP
+from gallery import normalize
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+# Re-running after a crash between commit and checkpoint, or over folders of
+# employees already registered through the API, refreshes the embedding and
+# keeps the existing profile instead of failing the whole batch
+INSERT_QUERY = """
+    INSERT INTO Employee (id, name, department, email, image_path, registration_date, face_embedding)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE face_embedding = VALUES(face_embedding)
+"""
+
+
+def list_images(directory):
+    return sorted(
+        path for path in glob.glob(os.path.join(directory, '*'))
+        if path.lower().endswith(IMAGE_EXTENSIONS)
+    )
+
+
+def name_from_images(paths):
+    stem = os.path.splitext(os.path.basename(paths[0]))[0]
+    return stem.rsplit('_', 1)[0].replace('_', ' ') if '_' in stem else stem
+
+
+def read_jobs(images_dir, manifest, department):
+    """Yield one {'id', 'name', 'department', 'email', 'images'} job per employee"""
+    if manifest:
+        with open(manifest, newline='') as f:
+            for row in csv.DictReader(f):
+                employee_id = row.get('id') or str(uuid.uuid5(uuid.NAMESPACE_URL, f"mailto:{row['email']}"))
+                if row.get('images'):
+                    images = [path.strip() for path in row['images'].split(';') if path.strip()]
+                else:
+                    images = list_images(os.path.join(images_dir or '.', employee_id))
+                yield {
+                    'id': employee_id,
+                    'name': row['name'],
+                    'department': row.get('department') or department,
+                    'email': row.get('email') or None,
+                    'images': images
+                }
+        return
+
+    for entry in sorted(os.scandir(images_dir), key=lambda e: e.name):
+        if not entry.is_dir():
+            continue
+        images = list_images(entry.path)
+        if images:
+            yield {
+                'id': entry.name,
+                'name': name_from_images(images),
+                'department': department,
+                'email': None,
+                'images': images
+            }
+
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def append_checkpoint(path, employee_ids):
+    with open(path, 'a') as f:
+        f.write(''.join(f"{employee_id}\n" for employee_id in employee_ids))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def init_worker():
+    import model_manager
+    model_manager.load()
+
+
+def embed_job(job):
+    """Worker: decode, detect and embed one employee's images"""
+    import model_manager
+
+    images = []
+    for path in job['images']:
+        img = cv2.imread(path)
+        if img is not None:
+            images.append(img)
+    if not images:
+        return job, None, 0, 'no readable images'
+
+    embedded = [item for item in model_manager.embed_many(images) if not isinstance(item, Exception)]
+    if not embedded:
+        return job, None, len(images), 'no face detected'
+
+    # One template per image, as register_employee stores them
+    templates = normalize(np.stack(embedded))[:max(1, TEMPLATE_CAP)]
+    return job, templates, len(images), None
+
+
+def flush(conn, rows, checkpoint):
+    with conn.cursor() as cursor:
+        cursor.executemany(INSERT_QUERY, rows)
+    conn.commit()
+    append_checkpoint(checkpoint, [row[0] for row in rows])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images-dir', help='directory with one sub-folder of images per employee')
+    parser.add_argument('--manifest', help='CSV manifest (id,name,department,email,images)')
+    parser.add_argument('--department', default='Imported', help='department for rows without one')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--batch-size', type=int, default=200, help='rows per executemany insert')
+    parser.add_argument('--dtype', choices=['json'] + sorted(embedding_codec.DTYPES),
+                        default=os.environ.get('EMBEDDING_STORAGE_FORMAT', 'json'),
+                        help='binary formats need migrate_embeddings.py to have run first')
+    parser.add_argument('--json-templates', action='store_true',
+                        default=os.environ.get('EMBEDDING_JSON_TEMPLATES', '0') == '1',
+                        help='store json rows as template sets; only once every app worker reads them')
+    parser.add_argument('--checkpoint', default='backend/data/bulk_enroll.done')
+    args = parser.parse_args()
+
+    if not args.images_dir and not args.manifest:
+        parser.error('one of --images-dir or --manifest is required')
+
+    done = load_checkpoint(args.checkpoint)
+    jobs = [job for job in read_jobs(args.images_dir, args.manifest, args.department) if job['id'] not in done]
+    print(f"{len(jobs)} employees to enroll ({len(done)} already done per {args.checkpoint})")
+    if not jobs:
+        return 0
+
+    from database import connect
+
+    os.makedirs(os.path.dirname(args.checkpoint) or '.', exist_ok=True)
+    conn = connect()
+    rows = []
+    enrolled = 0
+    failed = 0
+    images_seen = 0
+    started = time.perf_counter()
+    try:
+        with Pool(processes=args.workers, initializer=init_worker) as pool:
+            for job, embedding, image_count, error in pool.imap_unordered(embed_job, jobs, chunksize=4):
+                images_seen += image_count
+                if error:
+                    failed += 1
+                    print(f"Skipping {job['id']}: {error}")
+                    continue
+
+                rows.append((
+                    job['id'],
+                    job['name'],
+                    job['department'],
+                    job['email'],
+                    job['images'][0],
+                    datetime.now(),
+                    embedding_codec.to_column(embedding, args.dtype, json_templates=args.json_templates)
+                ))
+                if len(rows) >= args.batch_size:
+                    flush(conn, rows, args.checkpoint)
+                    enrolled += len(rows)
+                    rows = []
+                    elapsed = time.perf_counter() - started
+                    print(f"{enrolled} enrolled, {failed} failed, {images_seen / elapsed:.1f} images/sec")
+
+        if rows:
+            flush(conn, rows, args.checkpoint)
+            enrolled += len(rows)
+    finally:
+        conn.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"Enrolled {enrolled} employees ({failed} failed) from {images_seen} images "
+          f"in {elapsed:.1f}s ({images_seen / elapsed:.1f} images/sec)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
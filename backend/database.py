@@ -0,0 +1,39 @@
+"""
+MySQL access shared by the Flask routes and the offline maintenance scripts.
+"""
+
+import os
+
+import pymysql
+
+from db_pool import ConnectionPool
+
+# Streamed exports hold a connection for as long as the client takes to
+# download, so they get their own small pool instead of starving db_pool
+DB_EXPORT_POOL_SIZE = int(os.environ.get('DB_EXPORT_POOL_SIZE', '2'))
+DB_EXPORT_POOL_TIMEOUT = float(os.environ.get('DB_EXPORT_POOL_TIMEOUT', '2'))
+
+
+def connect():
+    """Open a new, unpooled connection"""
+    return pymysql.connect(
+    host='mt-uat-lighthouse.cal82oikkybf.ap-south-1.rds.amazonaws.com',
+    user='FaceRecongition',
+    password='password@123',
+    db='FaceRecognition',
+    cursorclass=pymysql.cursors.DictCursor
+)
+
+
+db_pool = ConnectionPool(connect)
+export_pool = ConnectionPool(connect, max_size=DB_EXPORT_POOL_SIZE, timeout=DB_EXPORT_POOL_TIMEOUT)
+
+
+def get_db_connection():
+    """Check out a pooled connection; close() returns it to the pool"""
+    return db_pool.acquire()
+
+
+def get_export_connection():
+    """Check out a connection from the export pool; raises PoolTimeout when every export slot is busy"""
+    return export_pool.acquire()
@@ -0,0 +1,172 @@
+"""
+Bounded, thread-safe MySQL connection pool.
+
+acquire() hands out a PooledConnection that behaves like the underlying
+pymysql connection; calling close() on it returns the connection to the pool
+instead of tearing down the TCP/TLS session. Idle connections are pinged
+before reuse and recycled once they exceed their maximum lifetime.
+"""
+
+import os
+import threading
+import time
+
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '10'))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', '10'))
+DB_POOL_MAX_LIFETIME = float(os.environ.get('DB_POOL_MAX_LIFETIME', '1800'))
+# Ping a connection on checkout if it has been idle this long (0 = always ping)
+DB_POOL_PING_AFTER = float(os.environ.get('DB_POOL_PING_AFTER', '30'))
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes available within the pool timeout"""
+
+
+class PooledConnection:
+    """Proxy for a pooled connection; close() releases it back to the pool"""
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+
+    def __getattr__(self, name):
+        raw = self.__dict__.get('_raw')
+        if raw is None:
+            raise AttributeError(f"Connection already returned to the pool ({name})")
+        return getattr(raw, name)
+
+    def close(self):
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            self._pool.release(raw)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        # Safety net for code paths that never reach close()
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    def __init__(self, factory, max_size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT,
+                 max_lifetime=DB_POOL_MAX_LIFETIME, ping_after=DB_POOL_PING_AFTER):
+        self.factory = factory
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.ping_after = ping_after
+        self._cond = threading.Condition()
+        self._idle = []
+        self._created_at = {}
+        self._open = 0
+        self._counters = {
+            'checkouts': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'created': 0,
+            'recycled': 0,
+            'ping_failures': 0,
+            'total_wait_ms': 0.0,
+            'max_wait_ms': 0.0
+        }
+
+    def acquire(self):
+        """Check out a healthy connection, waiting up to the pool timeout"""
+        started = time.perf_counter()
+        waited = False
+        with self._cond:
+            while True:
+                if self._idle:
+                    raw, idle_since = self._idle.pop()
+                    break
+                if self._open < self.max_size:
+                    self._open += 1
+                    raw = None
+                    break
+                waited = True
+                remaining = self.timeout - (time.perf_counter() - started)
+                if remaining <= 0 or not self._cond.wait(remaining):
+                    if not self._idle and self._open >= self.max_size:
+                        self._counters['timeouts'] += 1
+                        raise PoolTimeout(f"No database connection available after {self.timeout}s")
+
+            wait_ms = (time.perf_counter() - started) * 1000
+            self._counters['checkouts'] += 1
+            self._counters['waits'] += int(waited)
+            self._counters['total_wait_ms'] += wait_ms
+            self._counters['max_wait_ms'] = max(self._counters['max_wait_ms'], wait_ms)
+
+        try:
+            if raw is not None:
+                raw = self._check(raw, idle_since)
+            if raw is None:
+                raw = self._create()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+        return PooledConnection(self, raw)
+
+    def _create(self):
+        raw = self.factory()
+        with self._cond:
+            self._created_at[id(raw)] = time.monotonic()
+            self._counters['created'] += 1
+        return raw
+
+    def _check(self, raw, idle_since):
+        """Return raw if still usable, else discard it and return None"""
+        if time.monotonic() - self._created_at.get(id(raw), 0) > self.max_lifetime:
+            self._discard(raw, 'recycled')
+            return None
+        if time.monotonic() - idle_since >= self.ping_after:
+            try:
+                raw.ping(reconnect=False)
+            except Exception:
+                self._discard(raw, 'ping_failures')
+                return None
+        return raw
+
+    def _discard(self, raw, reason):
+        with self._cond:
+            self._created_at.pop(id(raw), None)
+            self._counters[reason] += 1
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def release(self, raw):
+        """Return a connection, ending any open transaction so the next user sees fresh data"""
+        try:
+            raw.rollback()
+        except Exception:
+            self._discard(raw, 'recycled')
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            return
+        with self._cond:
+            self._idle.append((raw, time.monotonic()))
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._counters)
+            stats.update({
+                'max_size': self.max_size,
+                'open': self._open,
+                'idle': len(self._idle),
+                'in_use': self._open - len(self._idle)
+            })
+        checkouts = stats['checkouts'] or 1
+        stats['avg_wait_ms'] = round(stats['total_wait_ms'] / checkouts, 3)
+        return stats
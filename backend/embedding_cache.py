@@ -0,0 +1,71 @@
+"""
+Per-employee embedding cache.
+
+Holds each employee's profile together with a pre-parsed matrix of
+L2-normalized float32 templates (see face_templates) so a check-in can score
+a capture without a MySQL round-trip or JSON parse. Entries are evicted least-recently-used and expire after a TTL.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+EMBEDDING_CACHE_SIZE = int(os.environ.get('EMBEDDING_CACHE_SIZE', '10000'))
+EMBEDDING_CACHE_TTL = float(os.environ.get('EMBEDDING_CACHE_TTL', '600'))
+
+
+class EmbeddingCache:
+    """Thread-safe LRU + TTL cache of {'profile': dict, 'templates': np.ndarray} by employee id"""
+
+    def __init__(self, max_size=EMBEDDING_CACHE_SIZE, ttl=EMBEDDING_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._counters = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0, 'invalidations': 0}
+
+    def get(self, employee_id):
+        with self._lock:
+            item = self._entries.get(employee_id)
+            if item is None:
+                self._counters['misses'] += 1
+                return None
+            expires_at, entry = item
+            if expires_at < time.monotonic():
+                del self._entries[employee_id]
+                self._counters['expired'] += 1
+                self._counters['misses'] += 1
+                return None
+            self._entries.move_to_end(employee_id)
+            self._counters['hits'] += 1
+            return entry
+
+    def put(self, employee_id, entry):
+        with self._lock:
+            self._entries[employee_id] = (time.monotonic() + self.ttl, entry)
+            self._entries.move_to_end(employee_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._counters['evictions'] += 1
+
+    def invalidate(self, employee_id):
+        with self._lock:
+            if self._entries.pop(employee_id, None) is not None:
+                self._counters['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats['size'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats.update({
+            'max_size': self.max_size,
+            'ttl_seconds': self.ttl,
+            'hit_ratio': round(stats['hits'] / lookups, 4) if lookups else 0.0
+        })
+        return stats
@@ -0,0 +1,108 @@
+"""
+Versioned binary storage format for face embeddings.
+
+Layout (little-endian):
+
+    offset 0  2 bytes  magic b'FE'
+    offset 2  uint8    format version (1)
+    offset 3  uint8    dtype code: 0 = float32, 1 = float16, 2 = int8
+    offset 4  uint16   rows (1 for a single embedding)
+    offset 6  uint16   dimensions per row
+    offset 8  float32  scale (int8 only)
+    then      rows * dim values
+
+float32 payloads decode zero-copy with np.frombuffer. Legacy rows written as
+JSON text (json.dumps of a list of floats) are still accepted by decode().
+
+to_column() is the single writer for the face_embedding column (JSON or
+binary) used by the app and the bulk enrollment script.
+"""
+
+import json
+import struct
+
+import numpy as np
+
+MAGIC = b'FE'
+VERSION = 1
+
+_HEADER = struct.Struct('<2sBBHH')
+_SCALE = struct.Struct('<f')
+
+DTYPES = {
+    'float32': (0, np.dtype('<f4')),
+    'float16': (1, np.dtype('<f2')),
+    'int8': (2, np.dtype('i1'))
+}
+_CODES = {code: (name, dtype) for name, (code, dtype) in DTYPES.items()}
+
+
+def is_binary(blob):
+    return isinstance(blob, (bytes, bytearray, memoryview)) and bytes(blob[:2]) == MAGIC
+
+
+def encode(vectors, dtype='float32'):
+    """Encode one embedding (or a rows x dim matrix) as bytes"""
+    if dtype not in DTYPES:
+        raise ValueError(f"Unsupported embedding dtype: {dtype}")
+    matrix = np.asarray(vectors, dtype=np.float32)
+    matrix = matrix.reshape(1, -1) if matrix.ndim == 1 else matrix
+    rows, dim = matrix.shape
+    code, np_dtype = DTYPES[dtype]
+
+    header = _HEADER.pack(MAGIC, VERSION, code, rows, dim)
+    if dtype == 'int8':
+        scale = float(np.abs(matrix).max()) / 127 or 1.0
+        payload = np.clip(np.round(matrix / scale), -127, 127).astype(np_dtype)
+        return header + _SCALE.pack(scale) + payload.tobytes()
+    return header + matrix.astype(np_dtype).tobytes()
+
+
+def to_column(vectors, storage_format='json', json_templates=True):
+    """face_embedding value for an embedding or template matrix.
+
+    storage_format is 'json' or one of DTYPES. With json_templates=False a
+    template matrix is stored as JSON of its normalized mean: a flat list,
+    like the single averaged embedding that pre-template workers expect.
+    """
+    if storage_format != 'json':
+        return encode(vectors, dtype=storage_format)
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if not json_templates and matrix.ndim == 2:
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix = (matrix / norms).mean(axis=0)
+    return json.dumps(np.asarray(matrix, dtype=np.float64).tolist())
+
+
+def decode_matrix(blob):
+    """Decode a stored embedding to a float32 rows x dim matrix (binary or legacy JSON)"""
+    if not is_binary(blob):
+        if isinstance(blob, (bytes, bytearray, memoryview)):
+            blob = bytes(blob).decode('utf-8')
+        matrix = np.asarray(json.loads(blob), dtype=np.float32)
+        return matrix.reshape(1, -1) if matrix.ndim == 1 else matrix
+
+    magic, version, code, rows, dim = _HEADER.unpack_from(blob, 0)
+    if version != VERSION:
+        raise ValueError(f"Unsupported embedding format version: {version}")
+    if code not in _CODES:
+        raise ValueError(f"Unsupported embedding dtype code: {code}")
+    name, np_dtype = _CODES[code]
+
+    offset = _HEADER.size
+    if name == 'int8':
+        scale, = _SCALE.unpack_from(blob, offset)
+        offset += _SCALE.size
+        values = np.frombuffer(blob, dtype=np_dtype, count=rows * dim, offset=offset)
+        return (values.astype(np.float32) * scale).reshape(rows, dim)
+
+    values = np.frombuffer(blob, dtype=np_dtype, count=rows * dim, offset=offset)
+    if name == 'float32':
+        return values.reshape(rows, dim)
+    return values.astype(np.float32).reshape(rows, dim)
+
+
+def decode(blob):
+    """Decode a stored single embedding to a float32 vector"""
+    return decode_matrix(blob).reshape(-1)
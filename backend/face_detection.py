@@ -0,0 +1,90 @@
+"""
+Configurable face detection stage.
+
+locate() runs a detector on a copy of the frame scaled to a target short
+side and maps the best (largest) face box back to full-resolution
+coordinates, so only the face crop is processed at full resolution.
+
+Backends:
+    haar       OpenCV Haar cascade bundled with opencv-python
+    yunet      OpenCV FaceDetectorYN; needs local ONNX weights at YUNET_MODEL_PATH
+    opencv, ssd, mtcnn, retinaface, mediapipe
+               DeepFace detector backends (weights must already be cached locally)
+"""
+
+import os
+import threading
+
+import cv2
+
+YUNET_MODEL_PATH = os.environ.get('YUNET_MODEL_PATH', 'backend/models/face_detection_yunet_2023mar.onnx')
+
+# Extra context kept around the detected box, as a fraction of its size
+CROP_MARGIN = 0.2
+
+OPENCV_BACKENDS = ('haar', 'yunet')
+
+_local = threading.local()
+
+
+def _haar():
+    cascade = getattr(_local, 'haar', None)
+    if cascade is None:
+        cascade = cv2.CascadeClassifier(os.path.join(cv2.data.haarcascades, 'haarcascade_frontalface_default.xml'))
+        _local.haar = cascade
+    return cascade
+
+
+def _yunet(size):
+    detector = getattr(_local, 'yunet', None)
+    if detector is None:
+        if not os.path.exists(YUNET_MODEL_PATH):
+            raise FileNotFoundError(f"YuNet weights not found at {YUNET_MODEL_PATH}")
+        detector = cv2.FaceDetectorYN.create(YUNET_MODEL_PATH, '', size, 0.8, 0.3, 50)
+        _local.yunet = detector
+    detector.setInputSize(size)
+    return detector
+
+
+def _boxes(small, backend):
+    """Face boxes (x, y, w, h) in the coordinates of the image passed in"""
+    if backend == 'haar':
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return [tuple(box) for box in _haar().detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5)]
+
+    if backend == 'yunet':
+        height, width = small.shape[:2]
+        _, faces = _yunet((width, height)).detect(small)
+        if faces is None:
+            return []
+        return [tuple(int(v) for v in face[:4]) for face in faces]
+
+    from deepface.detectors import FaceDetector
+    detector = FaceDetector.build_model(backend)
+    return [tuple(region) for _, region, _ in FaceDetector.detect_faces(detector, backend, small, align=False)]
+
+
+def locate(img, backend, short_side):
+    """Return the largest face box (x, y, w, h) in full-resolution coordinates, or None"""
+    height, width = img.shape[:2]
+    scale = 1.0
+    small = img
+    if short_side and min(height, width) > short_side:
+        scale = short_side / min(height, width)
+        small = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    boxes = [box for box in _boxes(small, backend) if box[2] > 0 and box[3] > 0]
+    if not boxes:
+        return None
+    x, y, w, h = max(boxes, key=lambda box: box[2] * box[3])
+    return tuple(int(round(v / scale)) for v in (x, y, w, h))
+
+
+def crop(img, box, margin=CROP_MARGIN):
+    """Full-resolution crop of box plus a margin, clipped to the image"""
+    x, y, w, h = box
+    height, width = img.shape[:2]
+    dx, dy = int(w * margin), int(h * margin)
+    x0, y0 = max(0, x - dx), max(0, y - dy)
+    x1, y1 = min(width, x + w + dx), min(height, y + h + dy)
+    return img[y0:y1, x0:x1]
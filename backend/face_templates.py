@@ -0,0 +1,88 @@
+"""
+Per-employee face template sets.
+
+Instead of one averaged embedding, each employee keeps a small matrix of up
+to TEMPLATE_CAP L2-normalized templates: the enrollment images, plus
+(optionally) check-in captures that matched with high confidence. A probe is
+scored against all templates with one matrix-vector product and the
+similarities are fused:
+
+    max   best single template; tolerant of lighting/pose changes (default)
+    mean  average similarity; stricter, closer to the old averaged embedding
+
+The matrix is stored in Employee.face_embedding with embedding_codec (one
+row per template). Legacy single-embedding rows load as a one-row set.
+
+When a new capture is added to a full set, the most redundant template is
+evicted: the one most similar to the rest of the set. This keeps the set
+diverse without needing per-template metadata.
+"""
+
+import os
+
+import numpy as np
+
+import embedding_codec
+from gallery import normalize
+
+TEMPLATE_CAP = int(os.environ.get('FACE_TEMPLATE_CAP', '5'))
+TEMPLATE_FUSION = os.environ.get('FACE_TEMPLATE_FUSION', 'max')
+# Auto-add check-in captures scoring at least this (0 disables auto-add)
+TEMPLATE_AUTO_ADD_THRESHOLD = float(os.environ.get('FACE_TEMPLATE_AUTO_ADD_THRESHOLD', '0'))
+# Captures this similar to an existing template add nothing new
+TEMPLATE_NOVELTY_THRESHOLD = float(os.environ.get('FACE_TEMPLATE_NOVELTY_THRESHOLD', '0.95'))
+
+FUSIONS = ('max', 'mean')
+
+
+def from_blob(blob):
+    """(K, D) normalized template matrix from a stored face_embedding value"""
+    return normalize(embedding_codec.decode_matrix(blob))
+
+
+def centroid(templates):
+    """Single normalized vector summarizing a template set (used by the 1:N gallery)"""
+    return normalize(templates.mean(axis=0))
+
+
+def fuse(similarities, fusion=TEMPLATE_FUSION):
+    """Fuse per-template similarities along the last axis"""
+    if fusion == 'mean':
+        return similarities.mean(axis=-1)
+    if fusion == 'max':
+        return similarities.max(axis=-1)
+    raise ValueError(f"Unknown template fusion: {fusion}")
+
+
+def score(templates, probes, fusion=TEMPLATE_FUSION):
+    """Fused similarity of one probe (float) or an (N, D) batch of probes (array of N)"""
+    probes = normalize(probes)
+    return fuse(probes @ templates.T, fusion)
+
+
+def should_add(templates, probe, confidence):
+    """True if a matched capture is confident and novel enough to become a template"""
+    if TEMPLATE_AUTO_ADD_THRESHOLD <= 0 or confidence < TEMPLATE_AUTO_ADD_THRESHOLD:
+        return False
+    return float((templates @ normalize(probe)).max()) < TEMPLATE_NOVELTY_THRESHOLD
+
+
+def add(templates, probe, cap=TEMPLATE_CAP):
+    """(matrix, kept): probe appended, the most redundant template evicted if over cap.
+
+    kept is False when the probe itself was the one evicted, i.e. the set is unchanged.
+    """
+    matrix = np.vstack([templates, normalize(probe).reshape(1, -1)])
+    probe_row = len(matrix) - 1
+    while len(matrix) > max(1, cap):
+        similarity = matrix @ matrix.T
+        np.fill_diagonal(similarity, -np.inf)
+        redundancy = similarity.max(axis=1)
+        # Ties go to the newest row so enrollment templates are kept
+        victim = len(redundancy) - 1 - int(redundancy[::-1].argmax())
+        matrix = np.delete(matrix, victim, axis=0)
+        if victim == probe_row:
+            return matrix, False
+        if victim < probe_row:
+            probe_row -= 1
+    return matrix, True
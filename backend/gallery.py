@@ -0,0 +1,129 @@
+"""
+In-memory face gallery for 1:N identification.
+
+Keeps every enrolled employee's L2-normalized float32 embedding in a vector
+index (exact or IVF, see gallery_index) alongside the employee profile for
+each id, and can persist both to disk so new workers start without a rebuild.
+"""
+
+import copy
+import json
+import os
+import threading
+import time
+import uuid
+
+import numpy as np
+
+import embedding_codec
+from gallery_index import ExactIndex, index_from_state
+
+
+def normalize(vectors):
+    """L2-normalize a vector or the rows of a matrix as float32"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class Gallery:
+    """Vector index plus the employee profile for each indexed id"""
+
+    def __init__(self, index=None):
+        self._lock = threading.Lock()
+        self.index = index if index is not None else ExactIndex()
+        self._profiles = {}
+        self.loaded_at = None
+
+    def __len__(self):
+        return len(self.index)
+
+    def load(self, rows):
+        """Replace the gallery with Employee rows (id, name, department, email, face_embedding)"""
+        ids = []
+        profiles = {}
+        vectors = []
+        for row in rows:
+            if not row.get('face_embedding'):
+                continue
+            embedding = row['face_embedding']
+            if isinstance(embedding, (str, bytes, bytearray)):
+                # Template sets are indexed by their centroid
+                embedding = normalize(embedding_codec.decode_matrix(embedding)).mean(axis=0)
+            ids.append(row['id'])
+            profiles[row['id']] = {
+                'id': row['id'],
+                'name': row['name'],
+                'department': row['department'],
+                'email': row['email']
+            }
+            vectors.append(embedding)
+
+        # Build a copy (keeping e.g. trained IVF centroids) outside the lock and
+        # swap it in, so searches keep using the old index during the rebuild
+        index = copy.copy(self.index)
+        index.build(ids, normalize(vectors) if vectors else [])
+        with self._lock:
+            self.index = index
+            self._profiles = profiles
+            self.loaded_at = time.time()
+
+    def add(self, profile, embedding):
+        """Insert or replace one employee's embedding"""
+        with self._lock:
+            self.index.add(profile['id'], normalize(embedding))
+            self._profiles[profile['id']] = {key: profile[key] for key in ('id', 'name', 'department', 'email')}
+
+    def remove(self, employee_id):
+        with self._lock:
+            self.index.remove(employee_id)
+            self._profiles.pop(employee_id, None)
+
+    def search(self, probe, k=5, threshold=0.0):
+        """Return up to k (profile, confidence) matches scoring above threshold, best first"""
+        probe = normalize(probe).reshape(-1)
+        with self._lock:
+            hits = self.index.search(probe, k)
+            return [(self._profiles[employee_id], score) for employee_id, score in hits if score > threshold]
+
+    def save(self, path):
+        """Atomically write the index and profiles to an .npz file"""
+        with self._lock:
+            state = self.index.state()
+            meta = {'profiles': self._profiles, 'loaded_at': self.loaded_at}
+        state['meta'] = np.array(json.dumps(meta))
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        # Unique per writer so concurrent workers never interleave into one temp file
+        temp_path = f"{path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(temp_path, 'wb') as f:
+                np.savez(f, **state)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def restore(self, path, kind=None):
+        """Load a previously saved gallery; returns False if missing or of another index kind.
+
+        The restored gallery counts as freshly loaded, so it serves for a full
+        GALLERY_TTL before the next database reload instead of being rebuilt
+        right away because the snapshot is older than the TTL.
+        """
+        if not os.path.exists(path):
+            return False
+        with np.load(path, allow_pickle=False) as data:
+            state = {key: data[key] for key in data.files}
+        if kind is not None and str(state['kind']) != kind:
+            return False
+
+        meta = json.loads(str(state.pop('meta')))
+        index = index_from_state(state)
+        with self._lock:
+            self.index = index
+            self._profiles = meta['profiles']
+            self.loaded_at = time.time()
+        return True
@@ -0,0 +1,260 @@
+"""
+Pluggable vector index layer behind the 1:N gallery.
+
+ExactIndex scores the probe against every enrolled vector. IVFIndex is an
+inverted-file approximate index (spherical k-means coarse quantizer, built
+locally with NumPy) that only scans the ``nprobe`` closest lists. Both support
+incremental add/remove and round-trip through a plain dict of arrays so the
+gallery can persist them to disk.
+"""
+
+import numpy as np
+
+# Rows scored per chunk when assigning vectors to IVF lists
+ASSIGN_CHUNK = 8192
+
+# Points per centroid needed before an IVF list is worth training
+MIN_POINTS_PER_LIST = 39
+
+# Lists scanned per query. With nlist = 4 * sqrt(N), bench_gallery_index.py at
+# 100k gives recall@1 ~0.91 for nprobe=8, ~0.99 for 32 and ~0.998 for 48
+# (0.6 ms against 4.5 ms for exact search)
+DEFAULT_NPROBE = 48
+
+
+def _top_k(ids, scores, k):
+    if not len(ids):
+        return []
+    k = min(k, len(ids))
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return [(ids[i], float(scores[i])) for i in top]
+
+
+class ExactIndex:
+    """Brute-force inner-product search over one float32 matrix"""
+
+    kind = 'exact'
+
+    def __init__(self):
+        self._ids = []
+        self._rows = {}
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def build(self, ids, vectors):
+        self._ids = list(ids)
+        self._rows = {employee_id: row for row, employee_id in enumerate(self._ids)}
+        if not self._ids:
+            self._matrix = np.zeros((0, 0), dtype=np.float32)
+            return
+        self._matrix = np.asarray(vectors, dtype=np.float32).reshape(len(self._ids), -1)
+
+    def add(self, employee_id, vector):
+        vector = np.asarray(vector, dtype=np.float32).reshape(1, -1)
+        if employee_id in self._rows:
+            self._matrix[self._rows[employee_id]] = vector[0]
+        elif self._ids:
+            self._rows[employee_id] = len(self._ids)
+            self._ids.append(employee_id)
+            self._matrix = np.vstack([self._matrix, vector])
+        else:
+            self.build([employee_id], vector)
+
+    def remove(self, employee_id):
+        row = self._rows.pop(employee_id, None)
+        if row is None:
+            return
+        # Move the last row into the hole so removal stays O(D)
+        last = len(self._ids) - 1
+        if row != last:
+            self._matrix[row] = self._matrix[last]
+            self._ids[row] = self._ids[last]
+            self._rows[self._ids[row]] = row
+        self._ids.pop()
+        self._matrix = self._matrix[:last]
+
+    def search(self, probe, k):
+        if not self._ids:
+            return []
+        return _top_k(self._ids, self._matrix @ probe, k)
+
+    def state(self):
+        return {
+            'kind': self.kind,
+            'ids': np.array(self._ids, dtype=str),
+            'vectors': self._matrix
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        index = cls()
+        index.build(state['ids'].tolist(), state['vectors'])
+        return index
+
+
+class IVFIndex:
+    """Inverted-file index: vectors are bucketed by their nearest k-means centroid"""
+
+    kind = 'ivf'
+
+    def __init__(self, nlist=None, nprobe=DEFAULT_NPROBE, seed=0):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.seed = seed
+        self.centroids = None
+        self.trained_size = 0
+        self._lists = []
+        self._where = {}
+
+    def __len__(self):
+        return len(self._where)
+
+    def train(self, vectors, iterations=20):
+        """Fit the coarse quantizer with spherical k-means on (a sample of) vectors"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        nlist = self.nlist or int(4 * np.sqrt(len(vectors)))
+        nlist = max(1, min(nlist, len(vectors) // MIN_POINTS_PER_LIST))
+
+        rng = np.random.default_rng(self.seed)
+        sample = vectors
+        if len(vectors) > nlist * 256:
+            sample = vectors[rng.choice(len(vectors), nlist * 256, replace=False)]
+
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assign = self._assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            empty = ~sums.any(axis=1)
+            # Re-seed empty clusters from random sample points
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+            centroids = sums / np.linalg.norm(sums, axis=1, keepdims=True)
+
+        self.centroids = centroids.astype(np.float32)
+        self.trained_size = len(vectors)
+
+    @staticmethod
+    def _assign(vectors, centroids):
+        assign = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), ASSIGN_CHUNK):
+            chunk = vectors[start:start + ASSIGN_CHUNK]
+            assign[start:start + ASSIGN_CHUNK] = np.argmax(chunk @ centroids.T, axis=1)
+        return assign
+
+    def build(self, ids, vectors, retrain=False):
+        """Bucket vectors into lists, training only when needed (first build or gallery doubled)"""
+        ids = list(ids)
+        if not ids:
+            self.centroids = None
+            self.trained_size = 0
+            self._lists, self._where = [], {}
+            return
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1)
+        if retrain or self.centroids is None or len(ids) > 2 * max(self.trained_size, 1):
+            self.train(vectors)
+
+        assign = self._assign(vectors, self.centroids)
+        self._lists = []
+        self._where = {}
+        for list_no in range(len(self.centroids)):
+            members = np.flatnonzero(assign == list_no)
+            list_ids = [ids[i] for i in members]
+            self._lists.append({'ids': list_ids, 'matrix': vectors[members]})
+            for employee_id in list_ids:
+                self._where[employee_id] = list_no
+
+    def add(self, employee_id, vector):
+        vector = np.asarray(vector, dtype=np.float32).reshape(1, -1)
+        if self.centroids is None:
+            self.build([employee_id], vector)
+            return
+        self.remove(employee_id)
+        list_no = int(np.argmax(self.centroids @ vector[0]))
+        bucket = self._lists[list_no]
+        bucket['ids'].append(employee_id)
+        bucket['matrix'] = np.vstack([bucket['matrix'], vector]) if len(bucket['matrix']) else vector
+        self._where[employee_id] = list_no
+
+    def remove(self, employee_id):
+        list_no = self._where.pop(employee_id, None)
+        if list_no is None:
+            return
+        bucket = self._lists[list_no]
+        row = bucket['ids'].index(employee_id)
+        bucket['ids'].pop(row)
+        bucket['matrix'] = np.delete(bucket['matrix'], row, axis=0)
+
+    def search(self, probe, k):
+        if not self._where:
+            return []
+        nprobe = min(self.nprobe, len(self.centroids))
+        probed = np.argpartition(-(self.centroids @ probe), nprobe - 1)[:nprobe]
+
+        ids = []
+        scores = []
+        for list_no in probed:
+            bucket = self._lists[list_no]
+            if bucket['ids']:
+                ids.extend(bucket['ids'])
+                scores.append(bucket['matrix'] @ probe)
+        if not ids:
+            return []
+        return _top_k(ids, np.concatenate(scores), k)
+
+    def state(self):
+        ids = []
+        lists = []
+        vectors = []
+        for list_no, bucket in enumerate(self._lists):
+            ids.extend(bucket['ids'])
+            lists.extend([list_no] * len(bucket['ids']))
+            if len(bucket['ids']):
+                vectors.append(bucket['matrix'])
+        return {
+            'kind': self.kind,
+            'ids': np.array(ids, dtype=str),
+            'vectors': np.concatenate(vectors) if vectors else np.zeros((0, 0), dtype=np.float32),
+            'lists': np.array(lists, dtype=np.int64),
+            'centroids': self.centroids if self.centroids is not None else np.zeros((0, 0), dtype=np.float32),
+            'nprobe': np.array(self.nprobe),
+            'trained_size': np.array(self.trained_size)
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        index = cls(nprobe=int(state['nprobe']))
+        if not len(state['centroids']):
+            return index
+        index.centroids = state['centroids'].astype(np.float32)
+        index.trained_size = int(state['trained_size'])
+        ids = state['ids'].tolist()
+        index._lists = [{'ids': [], 'matrix': np.zeros((0, 0), dtype=np.float32)} for _ in index.centroids]
+        for list_no, bucket in enumerate(index._lists):
+            members = np.flatnonzero(state['lists'] == list_no)
+            bucket['ids'] = [ids[i] for i in members]
+            bucket['matrix'] = state['vectors'][members]
+            for employee_id in bucket['ids']:
+                index._where[employee_id] = list_no
+        return index
+
+
+INDEX_TYPES = {
+    ExactIndex.kind: ExactIndex,
+    IVFIndex.kind: IVFIndex
+}
+
+
+def create_index(kind='exact', nlist=None, nprobe=DEFAULT_NPROBE):
+    """Build an empty index of the given kind ('exact' or 'ivf')"""
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"Unknown gallery index type: {kind}")
+    if kind == IVFIndex.kind:
+        return IVFIndex(nlist=nlist, nprobe=nprobe)
+    return ExactIndex()
+
+
+def index_from_state(state):
+    return INDEX_TYPES[str(state['kind'])].from_state(state)
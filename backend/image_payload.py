@@ -0,0 +1,60 @@
+"""
+Image payloads for the recognition and enrollment endpoints.
+
+Frames can arrive as a raw image/jpeg (or png / octet-stream) body, as a
+multipart file field, or as a base64 data URL inside JSON (the original
+format, still accepted). Raw and multipart bodies are decoded straight from
+the request buffer. That skips the JSON parse of a megabyte string, the
+base64 pass and its ~33% larger payload.
+"""
+
+import base64
+
+import cv2
+import numpy as np
+
+# Content types accepted as a raw binary image body
+RAW_IMAGE_TYPES = ('image/jpeg', 'image/png', 'application/octet-stream')
+
+
+def decode_bytes(data):
+    """Decode an encoded image held in any bytes-like buffer (no intermediate copy)"""
+    return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+
+
+def decode_base64(base64_string):
+    """Decode a base64 image, with or without a data URL prefix"""
+    if ',' in base64_string:
+        base64_string = base64_string.split(',')[1]
+    return decode_bytes(base64.b64decode(base64_string))
+
+
+def from_request(request, field='image'):
+    """Decoded frame plus the other fields from a raw image, multipart or base64 JSON body.
+
+    Raw bodies take their fields from the query string. Returns (img, fields)
+    with img None when no image was sent; raises ValueError if it can't be decoded.
+    """
+    if request.mimetype in RAW_IMAGE_TYPES:
+        data = request.get_data(cache=False)
+        fields = request.args
+    elif request.mimetype == 'multipart/form-data':
+        upload = request.files.get(field)
+        data = upload.read() if upload else None
+        fields = request.form
+    else:
+        fields = request.get_json(silent=True) or {}
+        image_base64 = fields.get(field)
+        if not image_base64:
+            return None, fields
+        img = decode_base64(image_base64)
+        if img is None:
+            raise ValueError("Failed to decode image")
+        return img, fields
+
+    if not data:
+        return None, fields
+    img = decode_bytes(data)
+    if img is None:
+        raise ValueError("Failed to decode image")
+    return img, fields
@@ -0,0 +1,367 @@
+"""
+Multi-process inference worker pool.
+
+The parent process builds the Facenet model once, then forks INFERENCE_WORKERS
+children that inherit the weights copy-on-write. Frames are passed through
+one shared-memory block split into fixed-size slots: the client copies a
+decoded frame into a free slot and sends only (slot, shape) down the pipe of
+the least busy worker. The worker detects, embeds and writes the embedding
+back into the same slot. No arrays are pickled in either direction.
+
+Each worker has its own pipe, so the parent always knows which slots a worker
+holds. A supervisor thread waits on the pipes and on the process sentinels.
+If a worker dies (OOM, segfault), it fails that worker's pending frames, frees
+their slots and respawns the worker with a backoff. A worker that has not
+warmed up within INFERENCE_WARMUP_TIMEOUT, or that sits on a frame for twice
+INFERENCE_RESULT_TIMEOUT, is killed and respawned. The pool reports ready
+only while every worker is alive and warm.
+
+The routes use the same embed()/embed_many() interface as inference_scheduler.
+
+TensorFlow is not fork-safe once it has started its thread pools, so the
+parent only builds the model (model_manager.preload) and never runs
+inference; each child warms up on its own. If a TensorFlow build still hangs
+after fork, set INFERENCE_POOL_START=spawn: each worker then loads its own
+copy of the weights, but frames still travel through shared memory. The same
+applies to respawned workers, which are forked from the running parent.
+"""
+
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+
+import cv2
+import numpy as np
+
+import model_manager
+
+INFERENCE_WORKERS = int(os.environ.get('INFERENCE_WORKERS', '0'))
+INFERENCE_POOL_START = os.environ.get('INFERENCE_POOL_START', 'fork')
+# Slot size for a decoded frame (height * width * 3 bytes); larger frames are downscaled to fit
+INFERENCE_MAX_FRAME_BYTES = int(os.environ.get('INFERENCE_MAX_FRAME_BYTES', str(1920 * 1080 * 3)))
+INFERENCE_RESULT_TIMEOUT = float(os.environ.get('INFERENCE_RESULT_TIMEOUT', '30'))
+# Seconds a (re)started worker may take to load and warm the model
+INFERENCE_WARMUP_TIMEOUT = float(os.environ.get('INFERENCE_WARMUP_TIMEOUT', '300'))
+# Longest wait before respawning a worker that keeps dying
+INFERENCE_MAX_RESPAWN_DELAY = 60.0
+
+# Space reserved after each frame for the returned embedding
+MAX_EMBEDDING_DIM = 512
+
+
+def _slot_size(max_frame_bytes):
+    size = max_frame_bytes + MAX_EMBEDDING_DIM * 4
+    return (size + 63) // 64 * 64
+
+
+def _worker(worker_id, shm_name, slot_size, max_frame_bytes, conn):
+    """Child process: warm the inherited model, then serve frames from shared memory"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        model_manager.load()
+    except Exception as e:
+        conn.send(('failed', worker_id, str(e)))
+        return
+    conn.send(('ready', worker_id, None))
+
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        slot, shape, enforce_detection = task
+        offset = slot * slot_size
+        try:
+            img = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=offset)
+            embedding = model_manager.embed([img], enforce_detection=enforce_detection)[0]
+            del img
+            out = np.ndarray((len(embedding),), dtype=np.float32, buffer=shm.buf, offset=offset + max_frame_bytes)
+            out[:] = embedding
+            del out
+            conn.send(('done', slot, len(embedding)))
+        except Exception as e:
+            conn.send(('error', slot, str(e)))
+    shm.close()
+
+
+class _Worker:
+    """Parent-side handle: process, pipe and the slots it is working on"""
+
+    def __init__(self, worker_id):
+        self.id = worker_id
+        self.process = None
+        self.conn = None
+        self.ready = False
+        self.started_at = None
+        self.deaths = 0
+        self.respawn_at = None
+        self.slots = {}  # slot -> monotonic time it was sent
+
+    def alive(self):
+        return self.process is not None and self.process.is_alive()
+
+
+class InferencePool:
+    def __init__(self, workers=INFERENCE_WORKERS, slots=None, max_frame_bytes=INFERENCE_MAX_FRAME_BYTES,
+                 start_method=INFERENCE_POOL_START, warmup_timeout=INFERENCE_WARMUP_TIMEOUT):
+        self.workers = max(1, workers)
+        self.slots = slots or self.workers * 2
+        self.max_frame_bytes = max_frame_bytes
+        self.start_method = start_method
+        self.warmup_timeout = warmup_timeout
+        self.slot_size = _slot_size(max_frame_bytes)
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._workers = []
+        self._ctx = None
+        self._shm = None
+        self._started = False
+        self._error = None
+        self._counters = {'frames': 0, 'errors': 0, 'slot_waits': 0, 'downscaled': 0,
+                          'worker_deaths': 0, 'respawns': 0, 'warmup_timeouts': 0, 'hung_workers': 0}
+
+    def start(self):
+        """Preload the model, create the shared-memory slots and fork the workers"""
+        if self._started:
+            return
+        self._started = True
+        self._ctx = mp.get_context(self.start_method)
+        if self.start_method == 'fork':
+            model_manager.preload()
+
+        self._shm = shared_memory.SharedMemory(create=True, size=self.slots * self.slot_size)
+        self._free = queue.Queue()
+        for slot in range(self.slots):
+            self._free.put(slot)
+
+        self._workers = [_Worker(worker_id) for worker_id in range(self.workers)]
+        for worker in self._workers:
+            self._spawn(worker)
+
+        threading.Thread(target=self._supervise, name='inference-pool-supervisor', daemon=True).start()
+
+    def _spawn(self, worker):
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_worker,
+            args=(worker.id, self._shm.name, self.slot_size, self.max_frame_bytes, child_conn),
+            name=f'inference-worker-{worker.id}',
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+        with self._lock:
+            worker.process = process
+            worker.conn = parent_conn
+            worker.ready = False
+            worker.started_at = time.monotonic()
+            worker.respawn_at = None
+
+    def _supervise(self):
+        """Resolve client futures from worker results and replace dead or stuck workers"""
+        while True:
+            with self._lock:
+                running = [worker for worker in self._workers if worker.respawn_at is None]
+            waitables = {}
+            for worker in running:
+                waitables[worker.conn] = worker
+                waitables[worker.process.sentinel] = worker
+
+            for ready in wait(list(waitables), timeout=1.0):
+                worker = waitables[ready]
+                if worker.respawn_at is not None:
+                    continue  # already handled through its other waitable
+                if ready is worker.conn:
+                    try:
+                        message = worker.conn.recv()
+                    except (EOFError, OSError):
+                        self._reap(worker)
+                        continue
+                    self._handle(worker, *message)
+                else:
+                    self._reap(worker)
+
+            now = time.monotonic()
+            for worker in self._workers:
+                if worker.respawn_at is not None:
+                    if now >= worker.respawn_at:
+                        self._counters['respawns'] += 1
+                        self._spawn(worker)
+                elif not worker.ready and now - worker.started_at > self.warmup_timeout:
+                    self._counters['warmup_timeouts'] += 1
+                    self._error = f"inference worker {worker.id} did not warm up within {self.warmup_timeout}s"
+                    worker.process.kill()
+                    self._reap(worker)
+                elif worker.slots and now - min(worker.slots.values()) > 2 * INFERENCE_RESULT_TIMEOUT:
+                    self._counters['hung_workers'] += 1
+                    self._error = f"inference worker {worker.id} stopped answering"
+                    worker.process.kill()
+                    self._reap(worker)
+
+    def _handle(self, worker, kind, key, value):
+        if kind == 'ready':
+            with self._lock:
+                worker.ready = True
+                worker.deaths = 0
+                if all(w.ready for w in self._workers):
+                    self._error = None
+            return
+        if kind == 'failed':
+            self._error = value
+            return
+
+        with self._lock:
+            if worker.slots.pop(key, None) is None:
+                return  # already failed and freed when the worker was reaped
+            future = self._pending.pop(key)
+        if kind == 'done':
+            out = np.ndarray((value,), dtype=np.float32, buffer=self._shm.buf,
+                             offset=key * self.slot_size + self.max_frame_bytes)
+            embedding = out.copy()
+            del out
+            self._free.put(key)
+            future.set_result(embedding)
+        else:
+            self._free.put(key)
+            with self._lock:
+                self._counters['errors'] += 1
+            future.set_exception(ValueError(value))
+
+    def _reap(self, worker):
+        """Fail a dead worker's frames, free their slots and schedule a respawn"""
+        # Results it sent before exiting are still good
+        try:
+            while worker.conn.poll():
+                self._handle(worker, *worker.conn.recv())
+        except (EOFError, OSError):
+            pass
+        worker.process.join(timeout=5)
+        exitcode = worker.process.exitcode
+        with self._lock:
+            slots, worker.slots = list(worker.slots), {}
+            futures = [self._pending.pop(slot, None) for slot in slots]
+            worker.ready = False
+            worker.deaths += 1
+            worker.respawn_at = time.monotonic() + min(2 ** (worker.deaths - 1), INFERENCE_MAX_RESPAWN_DELAY)
+            self._counters['worker_deaths'] += 1
+            self._counters['errors'] += len(slots)
+        worker.conn.close()
+        if self._error is None:
+            self._error = f"inference worker {worker.id} exited with code {exitcode}"
+        error = RuntimeError(f"Inference worker {worker.id} exited with code {exitcode}")
+        for slot, future in zip(slots, futures):
+            self._free.put(slot)
+            if future is not None:
+                future.set_exception(error)
+
+    def submit(self, img, enforce_detection=True):
+        """Copy a BGR frame into a free slot and send it to the least busy worker; returns a Future"""
+        img = np.ascontiguousarray(img, dtype=np.uint8)
+        if img.nbytes > self.max_frame_bytes:
+            img = self._fit(img)
+
+        try:
+            slot = self._free.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                self._counters['slot_waits'] += 1
+            slot = self._free.get(timeout=INFERENCE_RESULT_TIMEOUT)
+
+        view = np.ndarray(img.shape, dtype=np.uint8, buffer=self._shm.buf, offset=slot * self.slot_size)
+        view[...] = img
+        del view
+
+        future = Future()
+        with self._lock:
+            # Warm workers first; a warming one queues the frame until it is ready
+            candidates = [worker for worker in self._workers if worker.respawn_at is None and worker.alive()]
+            if not candidates:
+                self._free.put(slot)
+                raise RuntimeError("No inference worker is running")
+            worker = min(candidates, key=lambda w: (not w.ready, len(w.slots)))
+            worker.slots[slot] = time.monotonic()
+            self._pending[slot] = future
+            self._counters['frames'] += 1
+            try:
+                worker.conn.send((slot, img.shape, enforce_detection))
+            except (OSError, ValueError):
+                # Worker died under us; the supervisor frees the slot and fails the future
+                pass
+        return future
+
+    def _fit(self, img):
+        """Downscale a frame (e.g. a 12MP enrollment photo) so it fits in one slot"""
+        height, width = img.shape[:2]
+        scale = (self.max_frame_bytes / img.nbytes) ** 0.5
+        size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        img = np.ascontiguousarray(cv2.resize(img, size, interpolation=cv2.INTER_AREA))
+        with self._lock:
+            self._counters['downscaled'] += 1
+        return img
+
+    def embed_many(self, images, enforce_detection=True):
+        """List aligned with images holding a float32 embedding or the exception for that image"""
+        pending = []
+        for img in images:
+            try:
+                pending.append(self.submit(img, enforce_detection=enforce_detection))
+            except Exception as e:
+                pending.append(e)
+
+        results = []
+        for item in pending:
+            if isinstance(item, Exception):
+                results.append(item)
+                continue
+            try:
+                results.append(item.result(timeout=INFERENCE_RESULT_TIMEOUT))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def embed(self, images, enforce_detection=True):
+        """Return an (N, D) float32 array of embeddings; raises on the first failure"""
+        results = self.embed_many(images, enforce_detection=enforce_detection)
+        for item in results:
+            if isinstance(item, Exception):
+                raise item
+        if not results:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack(results)
+
+    def is_ready(self):
+        with self._lock:
+            return bool(self._workers) and all(worker.ready and worker.alive() for worker in self._workers)
+
+    def status(self):
+        with self._lock:
+            ready_workers = sum(worker.ready and worker.alive() for worker in self._workers)
+            alive_workers = sum(worker.alive() for worker in self._workers)
+        if ready_workers == self.workers:
+            status = model_manager.STATUS_READY
+        elif self._error:
+            status = model_manager.STATUS_FAILED
+        else:
+            status = model_manager.STATUS_LOADING if self._started else model_manager.STATUS_COLD
+        return {
+            'status': status,
+            'mode': 'pool',
+            'workers': self.workers,
+            'ready_workers': ready_workers,
+            'alive_workers': alive_workers,
+            'error': self._error
+        }
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats['in_flight'] = len(self._pending)
+        stats.update({'workers': self.workers, 'slots': self.slots, 'free_slots': self._free.qsize()})
+        return stats
@@ -0,0 +1,209 @@
+"""
+Micro-batching inference scheduler.
+
+Concurrent requests detect and align their faces on their own threads, then
+queue the aligned crops here. A single worker collects crops that arrive within
+a short window (or until the batch is full), runs them through one batched
+Facenet call and hands each waiting request its own embedding back.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+import metrics
+import model_manager
+
+BATCH_WINDOW_MS = float(os.environ.get('INFERENCE_BATCH_WINDOW_MS', '10'))
+MAX_BATCH_SIZE = int(os.environ.get('INFERENCE_MAX_BATCH_SIZE', '16'))
+RESULT_TIMEOUT = float(os.environ.get('INFERENCE_RESULT_TIMEOUT', '30'))
+
+
+class _Item:
+    """One or more crops from a single request; they always share a forward pass"""
+
+    __slots__ = ('crops', 'future', 'enqueued_at')
+
+    def __init__(self, crops):
+        self.crops = crops
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class InferenceScheduler:
+    """Queue plus worker thread that coalesces crops into batched forward passes"""
+
+    def __init__(self, embed_fn, window_ms=BATCH_WINDOW_MS, max_batch_size=MAX_BATCH_SIZE):
+        self.embed_fn = embed_fn
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max(1, max_batch_size)
+        self._queue = queue.Queue()
+        # Item taken off the queue that did not fit in the previous batch
+        self._carry = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stats = {
+            'batches': 0,
+            'items': 0,
+            'errors': 0,
+            'last_batch_size': 0,
+            'max_batch_size_seen': 0,
+            'total_wait_ms': 0.0,
+            'max_wait_ms': 0.0,
+            'total_inference_ms': 0.0
+        }
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='inference-scheduler', daemon=True)
+                self._thread.start()
+
+    def submit(self, crop):
+        """Queue one aligned crop; returns a Future resolving to its embedding"""
+        self._ensure_worker()
+        item = _Item([crop])
+        self._queue.put(item)
+        future = Future()
+        item.future.add_done_callback(lambda done: _unwrap(done, future))
+        return future
+
+    def submit_many(self, crops):
+        """Queue a request's crops as one group; returns a Future resolving to their embeddings.
+
+        A group is never split across forward passes. It may share one with
+        other requests, and runs on its own when larger than max_batch_size.
+        """
+        self._ensure_worker()
+        item = _Item(list(crops))
+        self._queue.put(item)
+        return item.future
+
+    def _collect(self):
+        first, self._carry = self._carry or self._queue.get(), None
+        batch = [first]
+        size = len(first.crops)
+        deadline = first.enqueued_at + self.window
+        while size < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                # Once the window closes, drain what is already waiting without extending it
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if size + len(item.crops) > self.max_batch_size:
+                self._carry = item
+                break
+            batch.append(item)
+            size += len(item.crops)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            waits = [(started - item.enqueued_at) * 1000 for item in batch for _ in item.crops]
+            try:
+                embeddings = self.embed_fn([crop for item in batch for crop in item.crops])
+                offset = 0
+                for item in batch:
+                    item.future.set_result(list(embeddings[offset:offset + len(item.crops)]))
+                    offset += len(item.crops)
+                failed = False
+            except Exception as e:
+                for item in batch:
+                    item.future.set_exception(e)
+                failed = True
+            inference_ms = (time.perf_counter() - started) * 1000
+
+            with self._lock:
+                self._stats['batches'] += 1
+                self._stats['items'] += len(waits)
+                self._stats['errors'] += int(failed)
+                self._stats['last_batch_size'] = len(waits)
+                self._stats['max_batch_size_seen'] = max(self._stats['max_batch_size_seen'], len(waits))
+                self._stats['total_wait_ms'] += sum(waits)
+                self._stats['max_wait_ms'] = max(self._stats['max_wait_ms'], max(waits))
+                self._stats['total_inference_ms'] += inference_ms
+
+    def stats(self):
+        """Queue depth, batch size and wait time counters"""
+        with self._lock:
+            stats = dict(self._stats)
+        batches = stats['batches'] or 1
+        items = stats['items'] or 1
+        stats.update({
+            'queue_depth': self._queue.qsize(),
+            'window_ms': self.window * 1000,
+            'max_batch_size': self.max_batch_size,
+            'avg_batch_size': round(stats['items'] / batches, 3),
+            'avg_wait_ms': round(stats['total_wait_ms'] / items, 3),
+            'avg_inference_ms': round(stats['total_inference_ms'] / batches, 3)
+        })
+        return stats
+
+
+def _unwrap(done, future):
+    if done.exception() is not None:
+        future.set_exception(done.exception())
+    else:
+        future.set_result(done.result()[0])
+
+
+_scheduler = InferenceScheduler(model_manager.embed_crops)
+
+
+def embed_many(images, enforce_detection=True):
+    """Embed images through the shared scheduler, tolerating per-image failures.
+
+    Detection runs on the calling thread; the crops are then submitted as one
+    group, so they share a single Facenet forward pass (possibly with other
+    requests). Returns a list aligned with ``images`` holding either a float32
+    embedding or the exception for that image.
+    """
+    with metrics.timed('inference', 'detect'):
+        detected = model_manager.detect(images, enforce_detection=enforce_detection)
+    crops = [item for item in detected if not isinstance(item, Exception)]
+    if not crops:
+        return detected
+
+    with metrics.timed('inference', 'embed'):
+        try:
+            embedded = iter(_scheduler.submit_many(crops).result(timeout=RESULT_TIMEOUT))
+        except Exception as e:
+            embedded = iter([e] * len(crops))
+    return [item if isinstance(item, Exception) else next(embedded) for item in detected]
+
+
+def embed(images, enforce_detection=True):
+    """Return an (N, D) float32 array of embeddings; raises on the first failure"""
+    results = embed_many(images, enforce_detection=enforce_detection)
+    for item in results:
+        if isinstance(item, Exception):
+            raise item
+    if not results:
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.stack(results)
+
+
+def stats():
+    return _scheduler.stats()
+
+
+def start():
+    """Load the in-process model in the background"""
+    model_manager.start()
+
+
+def is_ready():
+    return model_manager.is_ready()
+
+
+def status():
+    return dict(model_manager.status(), mode='in-process')
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Embedded local store for employees and attendance (SQLite in WAL mode).
+
+Replaces the backend/data/*.json files. Those were rewritten in full on every
+change and lost records when two writers raced. Every write here is a single
+indexed upsert or append in its own transaction. Employees are indexed by id
+and email, attendance by (employee_id, timestamp).
+
+With OFFLINE_MODE=1 an edge kiosk runs without MySQL. Registrations,
+embedding lookups, attendance and the employee/attendance listings all go
+through this store.
+
+Run from the backend directory to import the old JSON files or compact the
+database (checkpoint the WAL and VACUUM):
+    python local_store.py --import-json
+    python local_store.py --compact
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+LOCAL_STORE_PATH = os.environ.get('LOCAL_STORE_PATH', 'backend/data/local_store.db')
+OFFLINE_MODE = os.environ.get('OFFLINE_MODE', '0') == '1'
+
+LEGACY_EMPLOYEES_JSON = 'backend/data/employees.json'
+LEGACY_ATTENDANCE_JSON = 'backend/data/attendance.json'
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS employees (
+        id TEXT PRIMARY KEY,
+        email TEXT,
+        name TEXT,
+        department TEXT,
+        face_embedding BLOB,
+        data TEXT NOT NULL,
+        updated_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_employees_email ON employees (email);
+    CREATE TABLE IF NOT EXISTS attendance (
+        id TEXT PRIMARY KEY,
+        employee_id TEXT,
+        timestamp TEXT,
+        data TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_attendance_employee ON attendance (employee_id, timestamp);
+    CREATE INDEX IF NOT EXISTS idx_attendance_time ON attendance (timestamp, id);
+"""
+
+UPSERT_EMPLOYEE = """
+    INSERT INTO employees (id, email, name, department, face_embedding, data, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET
+        email = excluded.email,
+        name = excluded.name,
+        department = excluded.department,
+        face_embedding = COALESCE(excluded.face_embedding, employees.face_embedding),
+        data = excluded.data,
+        updated_at = excluded.updated_at
+"""
+
+
+def _default(value):
+    # datetimes (attendance timestamps) and anything else json can't encode
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+class LocalStore:
+    def __init__(self, path=LOCAL_STORE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stats = {'employee_writes': 0, 'attendance_writes': 0}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+
+    def _conn(self):
+        """One connection per thread; sqlite3 connections are not shared"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self._stats[key] += n
+
+    # Employees
+
+    def _employee_row(self, employee, face_embedding=None):
+        record = {key: value for key, value in employee.items() if key != 'face_embedding'}
+        return (
+            record.get('id'),
+            record.get('email'),
+            record.get('name'),
+            record.get('department'),
+            face_embedding if face_embedding is not None else employee.get('face_embedding'),
+            json.dumps(record, default=_default),
+            time.time()
+        )
+
+    def save_employee(self, employee, face_embedding=None):
+        """Insert or update one employee by id (a missing embedding keeps the stored one)"""
+        with self._conn() as conn:
+            conn.execute(UPSERT_EMPLOYEE, self._employee_row(employee, face_embedding))
+        self._count('employee_writes')
+
+    def replace_employees(self, employees):
+        """Atomically make the stored employees exactly this list"""
+        with self._conn() as conn:
+            conn.execute("DELETE FROM employees WHERE id NOT IN (SELECT value FROM json_each(?))",
+                         (json.dumps([employee.get('id') for employee in employees]),))
+            conn.executemany(UPSERT_EMPLOYEE, [self._employee_row(employee) for employee in employees])
+        self._count('employee_writes', len(employees))
+
+    def set_face_embedding(self, employee_id, face_embedding):
+        """Replace one employee's stored embedding / template set"""
+        with self._conn() as conn:
+            conn.execute("UPDATE employees SET face_embedding = ?, updated_at = ? WHERE id = ?",
+                         (face_embedding, time.time(), employee_id))
+        self._count('employee_writes')
+
+    def load_employees(self):
+        rows = self._conn().execute("SELECT data FROM employees ORDER BY rowid").fetchall()
+        return [json.loads(row['data']) for row in rows]
+
+    def get_employee(self, employee_id):
+        row = self._conn().execute("SELECT data FROM employees WHERE id = ?", (employee_id,)).fetchone()
+        return json.loads(row['data']) if row else None
+
+    def find_employee_by_email(self, email):
+        row = self._conn().execute("SELECT data FROM employees WHERE email = ? LIMIT 1", (email,)).fetchone()
+        return json.loads(row['data']) if row else None
+
+    def list_employees(self, q=None, department=None, after=None, limit=None):
+        """Employees ordered by (name, id), like GET /api/employees; after is the (name, id) keyset cursor"""
+        conditions = []
+        params = []
+        if q:
+            pattern = f"%{q}%"
+            conditions.append("(name LIKE ? OR department LIKE ? OR email LIKE ?)")
+            params.extend([pattern, pattern, pattern])
+        if department:
+            conditions.append("department = ?")
+            params.append(department)
+        if after is not None:
+            conditions.append("(name > ? OR (name = ? AND id > ?))")
+            params.extend([after[0], after[0], after[1]])
+        query = "SELECT data FROM employees"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY name, id"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return [json.loads(row['data']) for row in self._conn().execute(query, params).fetchall()]
+
+    def get_employee_row(self, employee_id):
+        """id, name, department, email, face_embedding for one employee, like the MySQL Employee row"""
+        row = self._conn().execute(
+            "SELECT id, name, department, email, face_embedding FROM employees WHERE id = ?", (employee_id,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def embedding_rows(self):
+        """Gallery rows for every employee with a registered embedding"""
+        rows = self._conn().execute(
+            "SELECT id, name, department, email, face_embedding FROM employees WHERE face_embedding IS NOT NULL"
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    # Attendance
+
+    def _attendance_row(self, record):
+        timestamp = record.get('timestamp')
+        return (
+            record.get('id'),
+            record.get('employee_id'),
+            _default(timestamp) if timestamp is not None else None,
+            json.dumps(record, default=_default)
+        )
+
+    def append_attendance(self, record):
+        """Append one attendance record; replaying the same id is a no-op"""
+        with self._conn() as conn:
+            conn.execute("INSERT OR IGNORE INTO attendance (id, employee_id, timestamp, data) VALUES (?, ?, ?, ?)",
+                         self._attendance_row(record))
+        self._count('attendance_writes')
+
+    def replace_attendance(self, records):
+        """Atomically replace every attendance record"""
+        with self._conn() as conn:
+            conn.execute("DELETE FROM attendance")
+            conn.executemany("INSERT OR IGNORE INTO attendance (id, employee_id, timestamp, data) VALUES (?, ?, ?, ?)",
+                             [self._attendance_row(record) for record in records])
+        self._count('attendance_writes', len(records))
+
+    def load_attendance(self, employee_id=None):
+        if employee_id is None:
+            rows = self._conn().execute("SELECT data FROM attendance ORDER BY rowid").fetchall()
+        else:
+            rows = self._conn().execute(
+                "SELECT data FROM attendance WHERE employee_id = ? ORDER BY timestamp", (employee_id,)
+            ).fetchall()
+        return [json.loads(row['data']) for row in rows]
+
+    def query_attendance(self, employee_id=None, type=None, start=None, end=None, before=None, limit=None):
+        """Attendance newest first, like GET /api/attendance; before is the (timestamp, id) keyset cursor"""
+        conditions = []
+        params = []
+        if employee_id:
+            conditions.append("employee_id = ?")
+            params.append(employee_id)
+        if type:
+            conditions.append("json_extract(data, '$.type') = ?")
+            params.append(type)
+        if start is not None:
+            conditions.append("timestamp >= ?")
+            params.append(_default(start))
+        if end is not None:
+            conditions.append("timestamp < ?")
+            params.append(_default(end))
+        if before is not None:
+            timestamp = _default(before[0])
+            conditions.append("(timestamp < ? OR (timestamp = ? AND id < ?))")
+            params.extend([timestamp, timestamp, before[1]])
+        query = "SELECT data FROM attendance"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY timestamp DESC, id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return [json.loads(row['data']) for row in self._conn().execute(query, params).fetchall()]
+
+    # Maintenance
+
+    def import_json(self, employees_path=LEGACY_EMPLOYEES_JSON, attendance_path=LEGACY_ATTENDANCE_JSON):
+        """Load the old JSON files (if present) and rename them to *.imported"""
+        imported = {'employees': 0, 'attendance': 0}
+        for key, path, save in (('employees', employees_path, self.save_employee),
+                                ('attendance', attendance_path, self.append_attendance)):
+            if not os.path.exists(path):
+                continue
+            with open(path, 'r') as f:
+                records = json.load(f)
+            # register_employee used to overwrite employees.json with a single record
+            if isinstance(records, dict):
+                records = [records]
+            for record in records:
+                if record.get('id'):
+                    save(record)
+                    imported[key] += 1
+            os.replace(path, path + '.imported')
+        return imported
+
+    def compact(self):
+        """Fold the WAL back into the main file and reclaim free pages"""
+        conn = self._conn()
+        conn.execute("VACUUM")
+        conn.execute("PRAGMA optimize")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def stats(self):
+        """Write counters since startup and file sizes; cheap enough for every metrics scrape"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats.update({
+            'path': self.path,
+            'offline_mode': OFFLINE_MODE,
+            'size_bytes': os.path.getsize(self.path) if os.path.exists(self.path) else 0,
+            'wal_bytes': os.path.getsize(self.path + '-wal') if os.path.exists(self.path + '-wal') else 0
+        })
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--path', default=LOCAL_STORE_PATH)
+    parser.add_argument('--import-json', action='store_true', help='import backend/data/employees.json and attendance.json')
+    parser.add_argument('--compact', action='store_true', help='checkpoint the WAL and VACUUM')
+    args = parser.parse_args()
+
+    if not args.import_json and not args.compact:
+        parser.print_help()
+        return 1
+
+    store = LocalStore(args.path)
+    if args.import_json:
+        imported = store.import_json()
+        print(f"Imported {imported['employees']} employees and {imported['attendance']} attendance records")
+    if args.compact:
+        before = store.stats()
+        store.compact()
+        after = store.stats()
+        print(f"Compacted {args.path}: {before['size_bytes'] + before['wal_bytes']} -> {after['size_bytes'] + after['wal_bytes']} bytes")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""
+Lightweight in-process metrics exported in Prometheus text format.
+
+Stage timers feed fixed-bucket histograms: an observation is one bisect and
+a few additions under a lock, cheap enough to leave on in production. The
+existing stats() dicts (DB pool, caches, queues, inference) are registered
+as collectors and read only when /api/metrics is scraped.
+
+    with metrics.timed('recognize', 'inference'):
+        ...
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; spans a cached lookup (~1 ms) up to a cold model call
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    def __init__(self, name, help, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            snapshot = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+        for labels, counts, total, count in sorted(snapshot):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f'{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.label_names, labels)} {total!r}')
+            lines.append(f'{self.name}_count{_labels(self.label_names, labels)} {count}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help, label_names=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            snapshot = sorted(self._values.items())
+        for labels, value in snapshot:
+            lines.append(f'{self.name}{_labels(self.label_names, labels)} {_number(value)}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def histogram(self, name, help, label_names=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, help, label_names, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, label_names=()):
+        metric = Counter(name, help, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def register_stats(self, prefix, stats_fn):
+        """Export every numeric value of a stats() dict as a gauge named prefix_key.
+
+        Nested dicts of numbers (e.g. rejection counts by reason) become one
+        gauge with a 'key' label.
+        """
+        self._collectors.append((prefix, stats_fn))
+
+    def _collect(self, prefix, stats_fn):
+        try:
+            stats = stats_fn()
+        except Exception:
+            return [f'# {prefix} collector failed']
+        lines = []
+        for key, value in sorted(stats.items()):
+            name = f'{prefix}_{key}'
+            if isinstance(value, bool):
+                value = int(value)
+            if isinstance(value, (int, float)):
+                lines += [f'# TYPE {name} gauge', f'{name} {_number(value)}']
+            elif isinstance(value, dict):
+                values = [(k, v) for k, v in sorted(value.items()) if isinstance(v, (int, float))]
+                if values:
+                    lines.append(f'# TYPE {name} gauge')
+                    lines += [f'{name}{_labels(("key",), (k,))} {_number(v)}' for k, v in values]
+        return lines
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines += metric.render()
+        for prefix, stats_fn in self._collectors:
+            lines += self._collect(prefix, stats_fn)
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+stage_seconds = registry.histogram(
+    'face_stage_seconds', 'Time spent in each request stage', ('route', 'stage'))
+request_seconds = registry.histogram(
+    'face_http_request_seconds', 'HTTP request latency by endpoint', ('endpoint', 'method', 'status'))
+
+
+@contextmanager
+def timed(route, stage):
+    """Record the duration of the enclosed block under route/stage"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_seconds.observe(time.perf_counter() - started, route, stage)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Convert Employee.face_embedding rows from JSON text to the binary format.
+
+Readers accept both formats, so this can run while the app is serving.
+The column is first widened to MEDIUMBLOB (JSON text stays valid in a BLOB),
+then rows are rewritten in id order, one committed batch at a time, so an
+interrupted run can simply be started again.
+
+Run from the backend directory:
+    python migrate_embeddings.py [--dtype float32] [--batch-size 500] [--skip-alter] [--dry-run]
+"""
+
+import argparse
+import sys
+
+import embedding_codec
+from database import connect
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dtype', choices=sorted(embedding_codec.DTYPES), default='float32')
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--skip-alter', action='store_true', help='do not change the column type')
+    parser.add_argument('--dry-run', action='store_true', help='report what would change without writing')
+    args = parser.parse_args()
+
+    conn = connect()
+    converted = 0
+    skipped = 0
+    failed = 0
+    try:
+        if not args.skip_alter and not args.dry_run:
+            with conn.cursor() as cursor:
+                cursor.execute("ALTER TABLE Employee MODIFY face_embedding MEDIUMBLOB")
+            conn.commit()
+            print("Altered Employee.face_embedding to MEDIUMBLOB")
+
+        last_id = ''
+        while True:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT id, face_embedding
+                    FROM Employee
+                    WHERE id > %s AND face_embedding IS NOT NULL
+                    ORDER BY id
+                    LIMIT %s
+                """, (last_id, args.batch_size))
+                rows = cursor.fetchall()
+            if not rows:
+                break
+            last_id = rows[-1]['id']
+
+            updates = []
+            for row in rows:
+                if embedding_codec.is_binary(row['face_embedding']):
+                    skipped += 1
+                    continue
+                try:
+                    vector = embedding_codec.decode_matrix(row['face_embedding'])
+                except Exception as e:
+                    print(f"Skipping {row['id']}: {str(e)}")
+                    failed += 1
+                    continue
+                updates.append((embedding_codec.encode(vector, dtype=args.dtype), row['id']))
+
+            if updates and not args.dry_run:
+                with conn.cursor() as cursor:
+                    cursor.executemany("UPDATE Employee SET face_embedding = %s WHERE id = %s", updates)
+                conn.commit()
+            converted += len(updates)
+            print(f"Up to id {last_id}: {converted} converted, {skipped} already binary, {failed} failed")
+    finally:
+        conn.close()
+
+    action = 'Would convert' if args.dry_run else 'Converted'
+    print(f"{action} {converted} embeddings to {args.dtype} ({skipped} already binary, {failed} failed)")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
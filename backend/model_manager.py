@@ -0,0 +1,232 @@
+"""
+Process-resident face model manager.
+
+Loads the Facenet weights and the face detector once per process, warms them
+with a dummy inference and exposes a single embed() call used by the routes.
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+import face_detection
+
+logger = logging.getLogger(__name__)
+
+# deepface (and TensorFlow with it) is imported by the first preload(), so
+# processes that never run inference don't pay for it
+DeepFace = None
+functions = None
+FaceDetector = None
+
+MODEL_NAME = 'Facenet'
+DETECTOR_BACKEND = os.environ.get('FACE_DETECTOR_BACKEND', 'opencv')
+
+# Detect on a copy scaled to this short side and embed only the full-resolution
+# face crop; 0 keeps DeepFace's full-frame detection for DeepFace backends
+DETECT_SHORT_SIDE = int(os.environ.get('DETECT_SHORT_SIDE', '0'))
+
+# Threads used to detect faces of a multi-image request in parallel
+DETECT_WORKERS = int(os.environ.get('DETECT_WORKERS', '4'))
+
+STATUS_COLD = 'cold'
+STATUS_LOADING = 'loading'
+STATUS_READY = 'ready'
+STATUS_FAILED = 'failed'
+
+_lock = threading.Lock()
+_detect_pool = ThreadPoolExecutor(max_workers=DETECT_WORKERS, thread_name_prefix='face-detect')
+_model = None
+_target_size = None
+_state = {
+    'status': STATUS_COLD,
+    'model': MODEL_NAME,
+    'detector': DETECTOR_BACKEND,
+    'detect_short_side': DETECT_SHORT_SIDE,
+    'load_seconds': None,
+    'error': None
+}
+
+
+def _import_deepface():
+    global DeepFace, functions, FaceDetector
+
+    if DeepFace is not None:
+        return
+    from deepface import DeepFace as deepface_api
+    from deepface.commons import functions as deepface_functions
+    from deepface.detectors import FaceDetector as face_detector
+    functions = deepface_functions
+    FaceDetector = face_detector
+    DeepFace = deepface_api
+
+
+def preload():
+    """Build the model and detector without running inference.
+
+    Used by inference_pool before forking workers: the weights are loaded
+    once in the parent and shared copy-on-write with the children.
+    """
+    global _model, _target_size
+
+    if _model is not None:
+        return
+    _import_deepface()
+    model = DeepFace.build_model(MODEL_NAME)
+    if DETECTOR_BACKEND not in face_detection.OPENCV_BACKENDS:
+        FaceDetector.build_model(DETECTOR_BACKEND)
+    _target_size = functions.find_target_size(model_name=MODEL_NAME)
+    _model = model
+
+
+def load():
+    """Load and warm the model and detector (blocking, idempotent)"""
+    with _lock:
+        if _state['status'] == STATUS_READY:
+            return
+        _state['status'] = STATUS_LOADING
+        _state['error'] = None
+        started = time.perf_counter()
+        try:
+            preload()
+
+            # Warm up: one detector pass and one forward pass so the first
+            # real request does not pay graph tracing / allocation costs
+            extract_face(np.zeros((_target_size[0] * 2, _target_size[1] * 2, 3), dtype=np.uint8), enforce_detection=False)
+            _model(np.zeros((1, _target_size[0], _target_size[1], 3), dtype=np.float32), training=False)
+
+            _state['status'] = STATUS_READY
+            _state['load_seconds'] = round(time.perf_counter() - started, 3)
+            logger.info("Model %s ready in %ss", MODEL_NAME, _state['load_seconds'])
+        except Exception as e:
+            _state['status'] = STATUS_FAILED
+            _state['error'] = str(e)
+            logger.exception("Model loading failed")
+            raise
+
+
+def start():
+    """Load the model in a background thread so the process can serve health checks"""
+    if _state['status'] in (STATUS_LOADING, STATUS_READY):
+        return
+
+    def _run():
+        try:
+            load()
+        except Exception:
+            pass
+
+    thread = threading.Thread(target=_run, name='model-loader', daemon=True)
+    thread.start()
+
+
+def is_ready():
+    return _state['status'] == STATUS_READY
+
+
+def status():
+    """Readiness state for /api/health"""
+    return dict(_state)
+
+
+def extract_face(img, enforce_detection=True, detector=None, short_side=None):
+    """Detect and align the first face in an image (path or BGR array).
+
+    detector and short_side default to FACE_DETECTOR_BACKEND and
+    DETECT_SHORT_SIDE; the benchmarks pass them explicitly.
+    """
+    detector = detector or DETECTOR_BACKEND
+    short_side = DETECT_SHORT_SIDE if short_side is None else short_side
+
+    if detector not in face_detection.OPENCV_BACKENDS and not short_side:
+        faces = functions.extract_faces(
+            img=img,
+            target_size=_target_size,
+            detector_backend=detector,
+            grayscale=False,
+            enforce_detection=enforce_detection,
+            align=True
+        )
+        img_pixels, region, confidence = faces[0]
+        return img_pixels, region
+
+    if isinstance(img, str):
+        img = cv2.imread(img)
+        if img is None:
+            raise ValueError("Failed to read image")
+
+    box = face_detection.locate(img, detector, short_side)
+    if box is None:
+        if enforce_detection:
+            raise ValueError("Face could not be detected. Please confirm that the picture is a face photo "
+                             "or consider to set enforce_detection param to False.")
+        face = img
+    else:
+        face = face_detection.crop(img, box)
+
+    # DeepFace backends re-detect on the small crop to align the eyes;
+    # the OpenCV backends feed the crop straight through
+    faces = functions.extract_faces(
+        img=face,
+        target_size=_target_size,
+        detector_backend='skip' if detector in face_detection.OPENCV_BACKENDS else detector,
+        grayscale=False,
+        enforce_detection=False,
+        align=True
+    )
+    img_pixels, region, confidence = faces[0]
+    if box is not None:
+        region = {'x': box[0], 'y': box[1], 'w': box[2], 'h': box[3]}
+    return img_pixels, region
+
+
+def detect(images, enforce_detection=True):
+    """Detect and align every image; failed images yield their exception instead of a crop"""
+    if not is_ready():
+        load()
+
+    def _detect_one(img):
+        try:
+            return extract_face(img, enforce_detection=enforce_detection)[0]
+        except Exception as e:
+            return e
+
+    if len(images) == 1:
+        return [_detect_one(images[0])]
+    return list(_detect_pool.map(_detect_one, images))
+
+
+def embed_crops(crops):
+    """Run one batched Facenet forward pass over aligned crops"""
+    if not crops:
+        return np.zeros((0, 0), dtype=np.float32)
+
+    batch = np.concatenate(crops, axis=0)
+    batch = functions.normalize_input(img=batch, normalization='base')
+    return np.asarray(_model(batch, training=False), dtype=np.float32)
+
+
+def embed_many(images, enforce_detection=True):
+    """Embed a batch of images, tolerating per-image failures.
+
+    Returns a list aligned with ``images`` holding either a float32 embedding
+    or the exception raised while detecting that image's face.
+    """
+    detected = detect(images, enforce_detection=enforce_detection)
+    crops = [item for item in detected if not isinstance(item, Exception)]
+    embeddings = iter(embed_crops(crops))
+    return [item if isinstance(item, Exception) else next(embeddings) for item in detected]
+
+
+def embed(images, enforce_detection=True):
+    """Return an (N, D) float32 array of embeddings, one per input image"""
+    detected = detect(images, enforce_detection=enforce_detection)
+    for item in detected:
+        if isinstance(item, Exception):
+            raise item
+    return embed_crops(detected)
@@ -0,0 +1,162 @@
+"""
+Tests for the write-behind attendance queue against benchmarks/fake_db.py.
+
+Run from the backend directory:
+    python -m unittest discover -s tests
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+import uuid
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'benchmarks'))
+
+import attendance_queue  # noqa: E402
+from attendance_queue import AttendanceQueue, _to_line  # noqa: E402
+from fake_db import FakeConnection, FakeCursor, FakeDatabase  # noqa: E402
+
+
+def make_event(**overrides):
+    event = {
+        'id': str(uuid.uuid4()),
+        'employee_id': 'emp-1',
+        'employee_name': 'Test Employee',
+        'type': 'check-in',
+        'confidence': 0.9,
+        'timestamp': datetime(2024, 1, 2, 9, 0, 0)
+    }
+    event.update(overrides)
+    return event
+
+
+class StrictCursor(FakeCursor):
+    """Rejects a non-numeric confidence the way pymysql/MySQL do"""
+
+    def _execute(self, query, params):
+        if 'INTO ATTENDANCE' in query.upper() and not isinstance(params[4], (int, float)):
+            raise TypeError(f"unsupported confidence {params[4]!r}")
+        super()._execute(query, params)
+
+
+class StrictConnection(FakeConnection):
+    def cursor(self, cursor_class=None):
+        return StrictCursor(self.db)
+
+
+class StrictDatabase(FakeDatabase):
+    def __init__(self, latency_ms=0.0):
+        super().__init__(latency_ms)
+        self.down = False
+
+    def connect(self):
+        if self.down:
+            raise ConnectionError("database unreachable")
+        return StrictConnection(self)
+
+
+class AttendanceQueueTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.wal_dir = self._tmp.name
+        self.db = StrictDatabase()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def make_queue(self):
+        # A long interval and batch size keep the background flusher idle;
+        # the tests call flush() themselves
+        queue = AttendanceQueue(self.db.connect, wal_dir=self.wal_dir, flush_interval=3600, batch_size=1000)
+        queue.start()
+        return queue
+
+    def test_recovers_orphaned_wal(self):
+        events = [make_event(), make_event(type='check-out')]
+        # Legacy <pid>.wal name: the current pid, as after a container restart
+        orphan = os.path.join(self.wal_dir, f"{os.getpid()}.wal")
+        with open(orphan, 'wb') as f:
+            for event in events:
+                f.write(_to_line(event))
+            f.write(b'{"torn": ')
+
+        queue = self.make_queue()
+
+        self.assertFalse(os.path.exists(orphan))
+        self.assertEqual(queue.stats()['recovered'], 2)
+        self.assertEqual(queue.flush(), 2)
+        self.assertEqual(set(self.db.attendance), {event['id'] for event in events})
+
+    def test_failing_row_is_dead_lettered(self):
+        queue = self.make_queue()
+        good = [make_event(), make_event()]
+        bad = make_event(confidence={'x': 1})
+        for event in (good[0], bad, good[1]):
+            queue.append(event)
+
+        queue.flush()
+
+        self.assertEqual(set(self.db.attendance), {event['id'] for event in good})
+        stats = queue.stats()
+        self.assertEqual(stats['pending'], 0)
+        self.assertEqual(stats['dead_lettered'], 1)
+        with open(os.path.join(self.wal_dir, attendance_queue.DEAD_LETTER_FILE)) as f:
+            dead = [json.loads(line) for line in f]
+        self.assertEqual([record['id'] for record in dead], [bad['id']])
+
+        # Later events are no longer stuck behind the bad one
+        queue.append(make_event())
+        self.assertEqual(queue.flush(), 1)
+        self.assertEqual(len(self.db.attendance), 3)
+
+    def test_connection_failure_keeps_events_pending(self):
+        queue = self.make_queue()
+        event = make_event()
+        queue.append(event)
+
+        self.db.down = True
+        with self.assertRaises(ConnectionError):
+            queue.flush()
+        self.assertEqual(queue.stats()['pending'], 1)
+        self.assertEqual(queue.stats()['dead_lettered'], 0)
+
+        self.db.down = False
+        self.assertEqual(queue.flush(), 1)
+        self.assertIn(event['id'], self.db.attendance)
+
+    def test_failed_hook_is_retried_with_next_flush(self):
+        calls = []
+
+        def on_flush(cursor, events):
+            calls.append([event['id'] for event in events])
+            if len(calls) == 1:
+                raise RuntimeError("rollup failed")
+
+        queue = AttendanceQueue(self.db.connect, wal_dir=self.wal_dir, flush_interval=3600,
+                                batch_size=1000, on_flush=on_flush)
+        queue.start()
+        first, second = make_event(), make_event()
+
+        queue.append(first)
+        queue.flush()
+        self.assertEqual(queue.stats()['hook_retry_pending'], 1)
+
+        queue.append(second)
+        queue.flush()
+        self.assertEqual(calls[-1], [first['id'], second['id']])
+        self.assertEqual(queue.stats()['hook_retry_pending'], 0)
+
+        # With nothing new to insert, a pending retry still runs
+        calls.clear()
+        queue._hook_retry = [first]
+        queue.flush()
+        self.assertEqual(calls, [[first['id']]])
+
+
+if __name__ == '__main__':
+    unittest.main()